@@ -1,345 +1,281 @@
 import streamlit as st
 import pandas as pd
-from datetime import datetime, timedelta
-import calendar
-import re
 import io
+import os
 
-class UgyeletiBeosztasGenerator:
-    def __init__(self):
-        self.orvosok = {}
-        self.keresek = {}  # {év: {hónap: {orvos: {nap: státusz}}}}
-        self.felhasznaloi_kivetelek = []  # [(orvos, datum, indok)]
-        self.weekday_exceptions = {}   # {orvos: [engedélyezett hét napok (0-6)]}
-        self.pairing_constraints = []  # [(orvos1, orvos2)]
-        
-    def excel_beolvasas(self, file_content):
-        """Excel tartalom feldolgozása memóriából"""
-        try:
-            excel_buffer = io.BytesIO(file_content)
-            xls = pd.ExcelFile(excel_buffer)
-            
-            for sheet_name in xls.sheet_names:
-                # Év és hónap meghatározása a munkalap nevéből
-                if sheet_name.startswith('25 '):
-                    ev = 2025
-                    honap = sheet_name.split(' ')[1].lower()
-                else:
-                    ev = 2024
-                    honap = sheet_name.lower()
-                
-                honapok = {
-                    'január': 1, 'február': 2, 'március': 3, 'április': 4,
-                    'május': 5, 'június': 6, 'július': 7, 'augusztus': 8,
-                    'szeptember': 9, 'október': 10, 'november': 11, 'december': 12
-                }
-                honap_szam = honapok.get(honap)
-                
-                if honap_szam:
-                    df = pd.read_excel(excel_buffer, sheet_name=sheet_name)
-                    orvos_oszlop = df.columns[0]
-                    
-                    for index, row in df.iterrows():
-                        orvos_nev = row[orvos_oszlop]
-                        if pd.notna(orvos_nev) and isinstance(orvos_nev, str):
-                            if orvos_nev not in self.orvosok:
-                                self.orvosok[orvos_nev] = {
-                                    'nev': orvos_nev,
-                                    'ugyeletek_szama': 0
-                                }
-                            for nap in range(1, 32):
-                                if str(nap) in df.columns:
-                                    status = row[str(nap)]
-                                    if pd.notna(status):
-                                        if ev not in self.keresek:
-                                            self.keresek[ev] = {}
-                                        if honap_szam not in self.keresek[ev]:
-                                            self.keresek[ev][honap_szam] = {}
-                                        if orvos_nev not in self.keresek[ev][honap_szam]:
-                                            self.keresek[ev][honap_szam][orvos_nev] = {}
-                                        self.keresek[ev][honap_szam][orvos_nev][nap] = status
-            excel_buffer.close()
-            return True
-            
-        except Exception as e:
-            st.error(f"Hiba az Excel beolvasása során: {str(e)}")
-            return False
+from ugyelet import GyujtoDiagnosztika, MunkafuzetCache, UgyeletiBeosztasGenerator, beosztas_tabla, javitas, kivetel_elemzo, muszakok, tobbinditas
+from ugyelet.export import beosztas_tabla_adatok, munkafuzet_iras, naptar_lapok, tabla_export, tabla_lap
+from ugyelet.hatter import BEFEJEZETT, HIBA, KESZ, VARAKOZIK, FeladatFuttato
+from ugyelet.meres import KIKAPCSOLT, Meres
+from ugyelet.nyilvantartas import Nyilvantartas, elozo_idoszak, honap_idoszak
 
-    def kivetel_hozzaadas(self, szoveg):
-        """Kivételek feldolgozása a felhasználói szövegből"""
-        if not szoveg:
-            return
-            
-        # Töröljük a meglévő kivételeket az új feldolgozás előtt
-        self.felhasznaloi_kivetelek = []
-        self.weekday_exceptions = {}
-        self.pairing_constraints = []
-            
-        for sor in szoveg.split('\n'):
-            if not sor.strip():
-                continue
-                
-            try:
-                szavak = sor.strip().split()
-                if len(szavak) < 2:
-                    continue
-                
-                # Az orvos neve (ha "Dr" szerepel, két szóból)
-                nev_vege = 1
-                if szavak[0].startswith('Dr'):
-                    nev_vege = 2
-                orvos_nev = ' '.join(szavak[:nev_vege])
-                
-                # Ha a sorban "nem dolgozhat" szerepel, akkor párosítási korlátozásról van szó
-                if "nem dolgozhat" in sor.lower():
-                    # Például: "Dr Kormos Ágnes nem dolgozhat Dr. Forró Tímeával."
-                    match = re.search(r'(?i)nem dolgozhat\s+(Dr\.?\s+\S+\s+\S+)', sor)
-                    if match:
-                        masodik_orvos = match.group(1).strip()
-                        self.pairing_constraints.append((orvos_nev, masodik_orvos))
-                    else:
-                        st.warning(f"Nem sikerült feldolgozni a párosítási kivételt ebben a sorban: {sor}")
-                    continue  # Ebben az esetben nem folytatjuk a további dátumfeldolgozást
-                
-                # Ha a sorban "csak" szerepel, illetve hétnapok (pl. "hétfőn") is, akkor hétköznapi kivételről van szó
-                if "csak" in sor.lower():
-                    # Magyar hét napjainak leképezése
-                    weekday_mapping = {
-                        'hétfő': 0,
-                        'kedd': 1,
-                        'szerda': 2,
-                        'csütörtök': 3,
-                        'péntek': 4,
-                        'szombat': 5,
-                        'vasárnap': 6
-                    }
-                    allowed_weekdays = []
-                    for szo in szavak:
-                        # Tisztítjuk a szót az írásjelektől
-                        clean_word = re.sub(r'[.,]', '', szo).lower()
-                        # Ha a szó végén "-n" szerepel (pl. "hétfőn"), eltávolítjuk
-                        if clean_word.endswith('n'):
-                            base = clean_word[:-1]
-                        else:
-                            base = clean_word
-                        if base in weekday_mapping:
-                            allowed_weekdays.append(weekday_mapping[base])
-                    if allowed_weekdays:
-                        self.weekday_exceptions[orvos_nev] = allowed_weekdays
-                        continue  # Ezt a sort így feldolgoztuk
-                    
-                datum_kezdet = None
-                datum_veg = None
-                datum_index = nev_vege
-                
-                tartomany_match = None
-                for i, szo in enumerate(szavak[datum_index:], datum_index):
-                    if "között" in szo or "-" in szo:
-                        tartomany_text = ' '.join(szavak[datum_index:i+2])
-                        mintak = [
-                            r'(\d{1,2})[.-](\d{1,2})',
-                            r'(\d{1,2})\s*(?:és|-)?\s*(\d{1,2})\s+között',
-                            r'(\d{4})[.-](\d{1,2})[.-](\d{1,2})\s*(?:és|-)?\s*(\d{4})[.-](\d{1,2})[.-](\d{1,2})'
-                        ]
-                        for minta in mintak:
-                            match = re.search(minta, tartomany_text)
-                            if match:
-                                tartomany_match = match
-                                datum_index = i
-                                break
-                        if tartomany_match:
-                            break
-                
-                if tartomany_match:
-                    honapok = {
-                        'január': 1, 'február': 2, 'március': 3, 'április': 4,
-                        'május': 5, 'június': 6, 'július': 7, 'augusztus': 8,
-                        'szeptember': 9, 'október': 10, 'november': 11, 'december': 12,
-                        'jan': 1, 'feb': 2, 'már': 3, 'ápr': 4, 'máj': 5, 'jún': 6,
-                        'júl': 7, 'aug': 8, 'szept': 9, 'okt': 10, 'nov': 11, 'dec': 12
-                    }
-                    honap = None
-                    ev = datetime.now().year
-                    for szo in szavak[:datum_index]:
-                        if szo.lower() in honapok:
-                            honap = honapok[szo.lower()]
-                        elif szo.isdigit() and len(szo) == 4:
-                            ev = int(szo)
-                    
-                    if honap is None:
-                        raise ValueError("Nem található hónap megjelölés")
-                    
-                    if len(tartomany_match.groups()) == 2:
-                        nap_kezdet = int(tartomany_match.group(1))
-                        nap_veg = int(tartomany_match.group(2))
-                        datum_kezdet = datetime(ev, honap, nap_kezdet)
-                        datum_veg = datetime(ev, honap, nap_veg)
-                    elif len(tartomany_match.groups()) == 6:
-                        datum_kezdet = datetime(
-                            int(tartomany_match.group(1)),
-                            int(tartomany_match.group(2)),
-                            int(tartomany_match.group(3))
-                        )
-                        datum_veg = datetime(
-                            int(tartomany_match.group(4)),
-                            int(tartomany_match.group(5)),
-                            int(tartomany_match.group(6))
-                        )
-                else:
-                    datum_kezdet = self._parse_simple_date(szavak[datum_index:])
-                    if datum_kezdet:
-                        datum_veg = datum_kezdet
-                
-                if not datum_kezdet or not datum_veg:
-                    st.warning(f"Nem sikerült feldolgozni a dátumot ebben a sorban: {sor}")
-                    continue
-                
-                indok_szavak = []
-                for szo in szavak[datum_index+1:]:
-                    if not any(k in szo.lower() for k in ['között', 'és']):
-                        indok_szavak.append(szo)
-                indok = ' '.join(indok_szavak) if indok_szavak else 'nem elérhető'
-                
-                aktualis_datum = datum_kezdet
-                while aktualis_datum <= datum_veg:
-                    self.felhasznaloi_kivetelek.append((
-                        orvos_nev,
-                        aktualis_datum.strftime('%Y-%m-%d'),
-                        indok
-                    ))
-                    aktualis_datum += timedelta(days=1)
-                
-            except Exception as e:
-                st.warning(f"Hiba a sor feldolgozása során: {sor} - {str(e)}")
-                continue
-    
-    def _parse_simple_date(self, szavak):
-        """Egyszerű dátum feldolgozása"""
-        honapok = {
-            'január': 1, 'február': 2, 'március': 3, 'április': 4,
-            'május': 5, 'június': 6, 'július': 7, 'augusztus': 8,
-            'szeptember': 9, 'október': 10, 'november': 11, 'december': 12,
-            'jan': 1, 'feb': 2, 'már': 3, 'ápr': 4, 'máj': 5, 'jún': 6,
-            'júl': 7, 'aug': 8, 'szept': 9, 'okt': 10, 'nov': 11, 'dec': 12
-        }
-        
-        try:
-            for i, szo in enumerate(szavak):
-                try:
-                    datum_str = szo.replace('.', '-')
-                    return datetime.strptime(datum_str, '%Y-%m-%d')
-                except ValueError:
-                    pass
-                
-                try:
-                    datum_str = szo.replace('.', '-')
-                    return datetime.strptime(datum_str, '%d-%m-%Y')
-                except ValueError:
-                    pass
-                
-                if i + 2 < len(szavak):
-                    try:
-                        ev = int(szavak[i])
-                        honap = honapok.get(szavak[i + 1].lower())
-                        nap = int(szavak[i + 2])
-                        if honap:
-                            return datetime(ev, honap, nap)
-                    except (ValueError, KeyError, IndexError):
-                        pass
-        except Exception:
-            return None
-        
-        return None
+# A háttérben gyűjtött üzenetek megjelenítése szintenként
+UZENET_KIMENETEK = {
+    'siker': st.success,
+    'info': st.info,
+    'figyelmeztetes': st.warning,
+    'hiba': st.error,
+}
 
-    def elerheto_orvosok(self, datum):
-        """Visszaadja az adott napon elérhető orvosokat"""
-        ev = datum.year
-        honap = datum.month
-        nap = datum.day
-        datum_str = datum.strftime('%Y-%m-%d')
-        
-        elerheto = []
-        for orvos in self.orvosok:
-            # Ellenőrizzük a dátumra vonatkozó kivételeket
-            kivetel_talalat = False
-            for kivetel in self.felhasznaloi_kivetelek:
-                if kivetel[0] == orvos and kivetel[1] == datum_str:
-                    kivetel_talalat = True
-                    break
-            if kivetel_talalat:
-                continue
-            # Ha van hétnapi kivétel, akkor csak az engedélyezett napokon lehet elérhető
-            if orvos in self.weekday_exceptions:
-                allowed = self.weekday_exceptions[orvos]
-                if datum.weekday() not in allowed:
-                    continue
-            if (ev in self.keresek and 
-                honap in self.keresek[ev] and 
-                orvos in self.keresek[ev][honap] and 
-                nap in self.keresek[ev][honap][orvos]):
-                status = self.keresek[ev][honap][orvos][nap]
-                if status not in ["Szabadság", "Ne ügyeljen"]:
-                    elerheto.append(orvos)
-            else:
-                elerheto.append(orvos)
-        return elerheto
+# A haladásjelző szövege szakaszonként
+SZAKASZ_NEVEK = {
+    'beolvasas': "Excel beolvasása",
+    'kivetelek': "Kivételek feldolgozása",
+    'beosztas': "Beosztás (nap)",
+    'cpsat_kereses': "Optimális beosztás keresése",
+    'tobbinditas': "Több indítás (változat)",
+    'javitas': "Beosztás javítása (nap)",
+    'export': "Exportálás",
+}
+
+MEGOLDO_NEVEK = {
+    'moho': "Mohó (gyors)",
+    'cpsat': "Optimális (OR-Tools CP-SAT)",
+    'tobbinditas': "Több indítás (párhuzamos, véletlenített mohó)",
+}
+
+# A közös méltányossági nyilvántartás SQLite fájlja
+NYILVANTARTAS_UTVONAL = os.environ.get('UGYELET_NYILVANTARTAS', 'ugyeleti_nyilvantartas.sqlite')
+
+# Letöltési formátumok: megjelenített név és MIME típus
+LETOLTESI_FORMATUMOK = {
+    'xlsx': ("Excel (naptár lapokkal)", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    'csv': ("CSV (csak a beosztás)", "text/csv"),
+    'parquet': ("Parquet (csak a beosztás)", "application/vnd.apache.parquet"),
+}
+
+@st.cache_resource
+def munkafuzet_cache():
+    """A munkamenetek között megosztott munkafüzet gyorsítótár"""
+    return MunkafuzetCache()
+
+@st.cache_resource
+def nyilvantartas():
+    """A munkamenetek között megosztott méltányossági nyilvántartás"""
+    return Nyilvantartas(NYILVANTARTAS_UTVONAL)
+
+@st.cache_resource
+def feladat_futtato():
+    """A munkamenetek között megosztott háttérfeladat futtató"""
+    return FeladatFuttato()
 
-    def can_pair(self, doc1, doc2):
-        """Ellenőrzi, hogy két orvos párosítható-e egymással"""
-        for a, b in self.pairing_constraints:
-            if (doc1 == a and doc2 == b) or (doc1 == b and doc2 == a):
-                return False
-        return True
+def teljesitmeny_panel(meres):
+    """A mért szakaszidők és számlálók táblázatosan, letölthető JSON-nal"""
+    osszesites = meres.osszesites()
+    with st.expander("Teljesítmény", expanded=True):
+        st.dataframe(pd.DataFrame(
+            [(nev, adat['hivasok'], adat['ido_s'] * 1000) for nev, adat in osszesites['szakaszok'].items()],
+            columns=['Szakasz', 'Hívások', 'Idő (ms)']
+        ), width=600)
+        st.dataframe(pd.DataFrame(
+            list(osszesites['szamlalok'].items()), columns=['Számláló', 'Érték']
+        ), width=600)
+        st.download_button(
+            label="Mérések letöltése (JSON)",
+            data=meres.json(indent=2),
+            file_name="meresek.json",
+            mime="application/json"
+        )
+
+def generalas(feladat, keres):
+    """A teljes generálás háttérfeladatként: beolvasás, beosztás, táblázatok és export
+    
+    keres: a gombnyomáskor rögzített beállítások. Itt Streamlit függvény nem
+    hívható, az üzenetek (szint, szöveg) párokként az eredménybe kerülnek.
+    """
+    diagnosztika = GyujtoDiagnosztika()
+    meres = Meres() if keres['teljesitmeny'] else KIKAPCSOLT
+    eredmeny = {'uzenetek': diagnosztika.uzenetek, 'meres': meres, 'beosztas': None}
+    ev, honap, megoldo = keres['ev'], keres['honap'], keres['megoldo']
+    
+    # Minden teljes generálás a beolvasott kérések tiszta pillanatképéből
+    # indul, így az ügyeletszámok nem halmozódnak az újrafuttatások között.
+    # Ugyanazt a fájlt nem olvassuk be újra.
+    feladat.haladas('beolvasas')
+    pillanatkep = keres['cache'].beolvasas(keres['file_content'], diagnosztika=diagnosztika, meres=meres)
+    if pillanatkep is None:
+        diagnosztika.hiba("Kérlek ellenőrizd az input fájl formátumát")
+        return eredmeny
+    diagnosztika.uzenetek.append(('siker', "Excel adatok sikeresen beolvasva!"))
+    nyilv = keres['nyilvantartas']
+    kulcs = (
+        MunkafuzetCache.kulcs(keres['file_content']), ev, honap, megoldo, keres['muszak_szoveg'],
+        nyilv is not None, keres['elozo_honapok']
+    )
+    elozo = keres['elozo']
     
-    def beosztas_generalas(self, ev, honap):
-        """Havi beosztás generálása két orvossal naponta"""
-        napok_szama = calendar.monthrange(ev, honap)[1]
-        beosztas = {}
+    feladat.haladas('kivetelek')
+    if elozo is not None and elozo['kulcs'] == kulcs and keres['muszak_beallitas'] is None:
+        # Ugyanarra a fájlra és hónapra csak a kivételek változtak:
+        # a meglévő beosztásnak csak az érintett napjait javítjuk
+        for sor in kivetel_elemzo.elemzes(keres['kivetelek_szoveg']).diagnosztikak:
+            diagnosztika.figyelmeztetes(sor.uzenet)
+        generator = keres['generator']
+        generator.meres = meres
+        generator.haladas = feladat.haladas
+        hozzaadott, torolt = javitas.szoveg_valtozas(elozo['kivetelek'], keres['kivetelek_szoveg'])
+        javitott = javitas.beosztas_javitas(generator, elozo['beosztas'], hozzaadott, torolt)
+        for figyelmeztetes in javitott.figyelmeztetesek:
+            diagnosztika.figyelmeztetes(figyelmeztetes)
+        beosztas = javitott.beosztas
+        valtozasok = javitott.valtozasok
+    else:
+        generator = UgyeletiBeosztasGenerator.pillanatkepbol(pillanatkep, diagnosztika, meres, feladat.haladas)
+        if nyilv is not None:
+            # A korábbi hónapok terhelése egyetlen összesítő lekérdezéssel
+            generator.elozmenyek_beallitas(nyilv.ugyeletszamok(*elozo_idoszak(ev, honap, keres['elozo_honapok'])))
+        if keres['kivetelek_szoveg']:
+            for sor in generator.kivetel_hozzaadas(keres['kivetelek_szoveg']):
+                diagnosztika.figyelmeztetes(sor.uzenet)
         
-        for nap in range(1, napok_szama + 1):
-            datum = datetime(ev, honap, nap)
-            datum_str = datum.strftime('%Y-%m-%d')
-            elerheto_orvosok = self.elerheto_orvosok(datum)
-            
-            if len(elerheto_orvosok) < 2:
-                st.warning(f"Nem található elegendő elérhető orvos: {datum_str} (minimum 2 szükséges)")
-                beosztas[datum_str] = []
-                continue
-            
-            # Első orvos kiválasztása
-            first = min(
-                elerheto_orvosok,
-                key=lambda x: self.orvosok[x]['ugyeletek_szama']
+        if keres['muszak_beallitas'] is not None:
+            if megoldo != 'moho':
+                diagnosztika.uzenetek.append(('info', "A több műszakos beosztás a mohó módszerrel készül."))
+            beosztas = generator.beosztas_generalas(
+                ev, honap, megoldo=muszakok.megoldo(keres['muszak_beallitas'])
             )
-            
-            # Második orvos kiválasztása, a párosítási korlátozást figyelembe véve
-            remaining = [doc for doc in elerheto_orvosok if doc != first and self.can_pair(first, doc)]
-            if not remaining:
-                st.warning(f"Nincs megfelelő második orvos a {datum_str} napon {first} esetében a párosítási kivétel miatt")
-                beosztas[datum_str] = [first]
-                self.orvosok[first]['ugyeletek_szama'] += 1
-                continue
-            
-            second = min(
-                remaining,
-                key=lambda x: self.orvosok[x]['ugyeletek_szama']
+        elif megoldo == 'tobbinditas':
+            # A legjobb indítás seedjével a beosztás pontosan megismételhető
+            inditas = tobbinditas.legjobb_inditas(generator, ev, honap, idokorlat=keres['idokorlat'])
+            diagnosztika.uzenetek.append(('info',
+                f"A legjobb indítás seedje: {inditas.seed} ({inditas.kiertekelt} változatból, "
+                f"hiányzó helyek: {inditas.pontszam.hiany})"
+            ))
+            beosztas = generator.beosztas_generalas(ev, honap, megoldo='veletlen_moho', seed=inditas.seed)
+        else:
+            beosztas = generator.beosztas_generalas(
+                ev, honap, megoldo=megoldo, idokorlat=keres['idokorlat']
             )
-            
-            beosztas[datum_str] = [first, second]
-            self.orvosok[first]['ugyeletek_szama'] += 1
-            self.orvosok[second]['ugyeletek_szama'] += 1
-        
-        return beosztas
+        valtozasok = None
+    generator.haladas = None
+    
+    terheles_df = None
+    if nyilv is not None:
+        nyilv.rogzites(beosztas)
+        tol = elozo_idoszak(ev, honap, keres['elozo_honapok'])[0]
+        terheles_df = pd.DataFrame(
+            [(orvos, *terheles) for orvos, terheles in sorted(nyilv.osszesites(tol, honap_idoszak(ev, honap)[1]).items())],
+            columns=['Orvos', 'Ügyeletek', 'Hétvégi', 'Ünnepnapi']
+        )
+    
+    beosztas_df = beosztas_tabla(beosztas)
+    kivetelek_df = None
+    if generator.felhasznaloi_kivetelek or generator.weekday_exceptions or generator.pairing_constraints:
+        extra_info = {
+            'Kivételes dátumok': generator.felhasznaloi_kivetelek,
+            'Hétköznapi kivételek': generator.weekday_exceptions,
+            'Párosítási korlátozások': generator.pairing_constraints
+        }
+        kivetelek_df = pd.DataFrame(dict([(k, pd.Series(v)) for k, v in extra_info.items()]))
+    statisztika_df = pd.DataFrame(
+        [(nev, adatok['ugyeletek_szama']) for nev, adatok in generator.orvosok.items()],
+        columns=['Orvos', 'Ügyeletek száma']
+    )
+    
+    # Exportálás: az Excel soronként, csak írható munkafüzetként készül
+    feladat.haladas('export')
+    letoltes = None
+    output_buffer = io.BytesIO()
+    try:
+        with meres.szakasz('export'):
+            if keres['formatum'] == 'xlsx':
+                lapok = [tabla_lap('Beosztás', beosztas_df), tabla_lap('Statisztika', statisztika_df)]
+                if kivetelek_df is not None:
+                    lapok.append(tabla_lap('Kivételek', kivetelek_df))
+                munkafuzet_iras(output_buffer, lapok, naptar_lapok({(ev, honap): beosztas}, list(generator.orvosok)))
+            else:
+                tabla_export(output_buffer, *beosztas_tabla_adatok(beosztas), keres['formatum'])
+        letoltes = output_buffer.getvalue()
+    except Exception as e:
+        diagnosztika.hiba(f"Hiba történt az exportálás során: {str(e)}")
+    finally:
+        output_buffer.close()
+    
+    eredmeny.update(
+        beosztas=beosztas, valtozasok=valtozasok, generator=generator,
+        utolso_generalas={'kulcs': kulcs, 'kivetelek': keres['kivetelek_szoveg'], 'beosztas': beosztas},
+        beosztas_df=beosztas_df, kivetelek_df=kivetelek_df, statisztika_df=statisztika_df, terheles_df=terheles_df,
+        letoltes=letoltes, ev=ev, honap=honap, formatum=keres['formatum'],
+    )
+    return eredmeny
+
+@st.fragment(run_every=0.5)
+def feladat_haladas(feladat):
+    """A futó feladat haladása és megszakítása; befejezéskor az oldal újrafut"""
+    allapot, szakasz, lepes, osszes = feladat.allapot_kep()
+    if allapot in BEFEJEZETT:
+        st.rerun()
+    if allapot == VARAKOZIK:
+        st.progress(0.0, text="Sorban áll, a többi generálás után indul...")
+    else:
+        szoveg = SZAKASZ_NEVEK.get(szakasz, "Generálás")
+        if osszes:
+            szoveg += f": {lepes} / {osszes}"
+        st.progress(min(lepes / osszes, 1.0) if osszes else 0.0, text=szoveg)
+    if st.button("Megszakítás", disabled=feladat.megszakitas_kerve):
+        feladat.megszakitas()
+        st.rerun()
+
+def feladat_lezaras(feladat):
+    """A befejezett feladat eredményének átvétele a munkamenetbe, egyszer"""
+    if st.session_state.get('lezart_feladat') == feladat.azonosito:
+        return
+    st.session_state.lezart_feladat = feladat.azonosito
+    if feladat.allapot == KESZ and feladat.eredmeny['beosztas'] is not None:
+        st.session_state.generator = feladat.eredmeny['generator']
+        st.session_state.utolso_generalas = feladat.eredmeny['utolso_generalas']
+    else:
+        # Megszakított javítás után a generátor félkész lehet: legközelebb teljes generálás
+        st.session_state.pop('utolso_generalas', None)
+
+def eredmeny_megjelenites(eredmeny):
+    """Egy befejezett generálás üzenetei, táblázatai és letöltése"""
+    for szint, uzenet in eredmeny['uzenetek']:
+        UZENET_KIMENETEK[szint](uzenet)
+    if eredmeny['beosztas'] is None:
+        return
+    
+    st.subheader("Generált beosztás")
+    st.dataframe(eredmeny['beosztas_df'], width=1000, height=600)
+    
+    valtozasok = eredmeny['valtozasok']
+    if valtozasok is not None:
+        st.subheader("Módosított napok")
+        if valtozasok:
+            st.dataframe(pd.DataFrame(
+                [(v.datum, ', '.join(v.regi), ', '.join(v.uj)) for v in valtozasok],
+                columns=['Dátum', 'Korábban', 'Most']
+            ), width=1000)
+        else:
+            st.write("A kivételek változása nem érintette a beosztást.")
+    
+    if eredmeny['kivetelek_df'] is not None:
+        st.subheader("Feldolgozott kivételek")
+        st.dataframe(eredmeny['kivetelek_df'], width=1000, height=600)
+    
+    st.subheader("Ügyeletek statisztikája")
+    st.dataframe(eredmeny['statisztika_df'], width=600, height=300)
+    
+    if eredmeny['terheles_df'] is not None:
+        st.subheader("Terhelés a nyilvántartás szerint (ezzel a hónappal együtt)")
+        st.dataframe(eredmeny['terheles_df'], width=600, height=300)
+    
+    if eredmeny['letoltes'] is not None:
+        formatum = eredmeny['formatum']
+        st.download_button(
+            label="Beosztás letöltése",
+            data=eredmeny['letoltes'],
+            file_name=f"ugyeleti_beosztas_{eredmeny['ev']}_{eredmeny['honap']}.{formatum}",
+            mime=LETOLTESI_FORMATUMOK[formatum][1]
+        )
+    
+    if eredmeny['meres']:
+        teljesitmeny_panel(eredmeny['meres'])
 
 def main():
     st.set_page_config(page_title="Ügyeleti Beosztás Generáló", layout="wide")
     st.title("Ügyeleti Beosztás Generáló")
     
-    # Ellenőrizzük, hogy a session state-ben lévő generator objektum helyes-e,
-    # ha nincs, vagy nem rendelkezik az excel_beolvasas metódussal, akkor új példányt készítünk.
-    if 'generator' not in st.session_state or not hasattr(st.session_state.generator, 'excel_beolvasas'):
-        st.session_state.generator = UgyeletiBeosztasGenerator()
-    
     feltoltott_file = st.file_uploader("Ügyeleti kérések Excel feltöltése", type=["xlsx"])
     
     col1, col2 = st.columns(2)
@@ -348,6 +284,28 @@ def main():
     with col2:
         honap = st.selectbox("Hónap", list(range(1, 13)))
     
+    col3, col4 = st.columns(2)
+    with col3:
+        megoldo = st.selectbox(
+            "Beosztási módszer", list(MEGOLDO_NEVEK), format_func=MEGOLDO_NEVEK.get
+        )
+    with col4:
+        idokorlat = st.number_input(
+            "Időkorlát (másodperc)", min_value=1, max_value=300, value=10,
+            help="Az optimális és a több indításos módszernél: ennyi ideig keres jobb beosztást."
+        )
+    
+    col5, col6 = st.columns(2)
+    with col5:
+        letoltesi_formatum = st.selectbox(
+            "Letöltési formátum", list(LETOLTESI_FORMATUMOK),
+            format_func=lambda formatum: LETOLTESI_FORMATUMOK[formatum][0]
+        )
+    with col6:
+        teljesitmeny = st.checkbox(
+            "Teljesítmény panel", help="A generálás szakaszainak ideje és a számlálók megjelenítése."
+        )
+    
     with st.expander("További kivételek megadása"):
         st.write("""
         Itt adhat meg további kivételeket szabad szöveggel. Például:
@@ -362,69 +320,74 @@ def main():
             help="Soronként egy kivétel: adja meg az orvos nevét, a dátumot vagy a napokat, illetve az indokot, illetve a párosítási korlátozást."
         )
     
-    if feltoltott_file is not None and st.button("Beosztás generálása"):
-        file_content = feltoltott_file.read()
-        if st.session_state.generator.excel_beolvasas(file_content):
-            st.success("Excel adatok sikeresen beolvasva!")
-            
-            if kivetelek_szoveg:
-                st.session_state.generator.kivetel_hozzaadas(kivetelek_szoveg)
-            
-            beosztas = st.session_state.generator.beosztas_generalas(ev, honap)
-            
-            st.subheader("Generált beosztás")
-            beosztas_lista = []
-            for datum, orvosok in beosztas.items():
-                beosztas_lista.append({
-                    'Dátum': datum,
-                    'Első Orvos': orvosok[0] if len(orvosok) > 0 else None,
-                    'Második Orvos': orvosok[1] if len(orvosok) > 1 else None
-                })
-            
-            beosztas_df = pd.DataFrame(beosztas_lista)
-            beosztas_df = beosztas_df.sort_values('Dátum')
-            st.dataframe(beosztas_df, width=1000, height=600)
-            
-            if st.session_state.generator.felhasznaloi_kivetelek or st.session_state.generator.weekday_exceptions or st.session_state.generator.pairing_constraints:
-                st.subheader("Feldolgozott kivételek")
-                extra_info = {
-                    'Kivételes dátumok': st.session_state.generator.felhasznaloi_kivetelek,
-                    'Hétköznapi kivételek': st.session_state.generator.weekday_exceptions,
-                    'Párosítási korlátozások': st.session_state.generator.pairing_constraints
-                }
-                kivetelek_df = pd.DataFrame(dict([(k, pd.Series(v)) for k, v in extra_info.items()]))
-                st.dataframe(kivetelek_df, width=1000, height=600)
-            
-            st.subheader("Ügyeletek statisztikája")
-            statisztika_df = pd.DataFrame(
-                [(nev, adatok['ugyeletek_szama']) 
-                 for nev, adatok in st.session_state.generator.orvosok.items()],
-                columns=['Orvos', 'Ügyeletek száma']
-            )
-            st.dataframe(statisztika_df, width=600, height=300)
-            
-            # Excel exportálás
-            output_buffer = io.BytesIO()
+    with st.expander("Műszakok és osztályok"):
+        st.write("""
+        Üresen hagyva naponta két orvos kerül beosztásra. Több műszakhoz és
+        osztályhoz JSON beállítás adható meg (a napok: 0 = hétfő ... 6 = vasárnap):
+        """)
+        st.code("""{
+  "muszakok": [
+    {"nev": "nappali", "osztaly": "Belgyógyászat", "letszam": 2},
+    {"nev": "éjszakai", "osztaly": "Belgyógyászat", "letszam": 1, "kepesitesek": ["szakorvos"]},
+    {"nev": "hétvégi", "osztaly": "Sebészet", "letszam": 3, "napok": [5, 6]}
+  ],
+  "orvosok": {
+    "Dr. Kiss Péter": {"osztalyok": ["Belgyógyászat"], "kepesitesek": ["szakorvos"]}
+  }
+}""", language="json")
+        muszak_szoveg = st.text_area("Műszak beállítás (JSON)")
+        muszak_beallitas = None
+        muszak_hiba = None
+        if muszak_szoveg.strip():
             try:
-                with pd.ExcelWriter(output_buffer, engine='openpyxl') as writer:
-                    beosztas_df.to_excel(writer, sheet_name='Beosztás', index=False)
-                    statisztika_df.to_excel(writer, sheet_name='Statisztika', index=False)
-                    if st.session_state.generator.felhasznaloi_kivetelek or st.session_state.generator.weekday_exceptions or st.session_state.generator.pairing_constraints:
-                        kivetelek_df.to_excel(writer, sheet_name='Kivételek', index=False)
-                
-                output_buffer.seek(0)
-                st.download_button(
-                    label="Beosztás letöltése",
-                    data=output_buffer,
-                    file_name=f"ugyeleti_beosztas_{ev}_{honap}.xlsx",
-                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-                )
-            except Exception as e:
-                st.error(f"Hiba történt az Excel exportálása során: {str(e)}")
-            finally:
-                output_buffer.close()
+                muszak_beallitas = muszakok.beallitas_betoltes(muszak_szoveg)
+            except ValueError as e:
+                muszak_hiba = str(e)
+                st.error(muszak_hiba)
+    
+    with st.expander("Méltányossági nyilvántartás"):
+        nyilvantartas_hasznalat = st.checkbox(
+            "Korábbi ügyeletek figyelembevétele és az eredmény rögzítése",
+            help="Az ügyeletszámok a közös nyilvántartás előző hónapjaiból indulnak, az új beosztás "
+                 "pedig bekerül a nyilvántartásba (ugyanannak a hónapnak az újragenerálása felülírja)."
+        )
+        elozo_honapok = st.number_input("Figyelembe vett előző hónapok", min_value=1, max_value=60, value=12)
+    
+    # A munkamenet háttérfeladatai {azonosító: Feladat}; egyszerre egy generálás fut
+    feladatok = st.session_state.setdefault('feladatok', {})
+    aktiv = feladatok.get(st.session_state.get('aktiv_feladat'))
+    fut = aktiv is not None and not aktiv.befejezodott
+    
+    if feltoltott_file is not None and st.button("Beosztás generálása", disabled=muszak_hiba is not None or fut):
+        keres = {
+            'cache': munkafuzet_cache(),
+            'file_content': feltoltott_file.getvalue(),
+            'ev': ev, 'honap': honap, 'megoldo': megoldo, 'idokorlat': idokorlat,
+            'kivetelek_szoveg': kivetelek_szoveg,
+            'muszak_szoveg': muszak_szoveg, 'muszak_beallitas': muszak_beallitas,
+            'formatum': letoltesi_formatum, 'teljesitmeny': teljesitmeny,
+            'nyilvantartas': nyilvantartas() if nyilvantartas_hasznalat else None,
+            'elozo_honapok': elozo_honapok,
+            'elozo': st.session_state.get('utolso_generalas'),
+            'generator': st.session_state.get('generator'),
+        }
+        for azonosito in [azonosito for azonosito, feladat in feladatok.items() if feladat.befejezodott]:
+            del feladatok[azonosito]
+        aktiv = feladat_futtato().inditas(generalas, keres, nev=f"{ev}-{honap:02d}")
+        feladatok[aktiv.azonosito] = aktiv
+        st.session_state.aktiv_feladat = aktiv.azonosito
+    
+    if aktiv is not None:
+        if not aktiv.befejezodott:
+            feladat_haladas(aktiv)
         else:
-            st.error("Kérlek ellenőrizd az input fájl formátumát")
+            feladat_lezaras(aktiv)
+            if aktiv.allapot == KESZ:
+                eredmeny_megjelenites(aktiv.eredmeny)
+            elif aktiv.allapot == HIBA:
+                st.error(f"Hiba történt a generálás során: {aktiv.hiba}")
+            else:
+                st.warning("A generálás megszakítva.")
 
 
    # Footer hozzáadása
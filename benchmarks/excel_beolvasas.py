@@ -0,0 +1,82 @@
+"""Mikro-benchmark az Excel beolvasáshoz
+
+Egy szintetikus, 24 munkalapos, 200 orvosos munkafüzeten méri a régi
+(munkalaponként újranyitó, iterrows alapú) beolvasást, az új egymenetes
+pandas utat és a streaming openpyxl utat.
+
+Futtatás a repó gyökeréből:
+    python benchmarks/excel_beolvasas.py [--orvosok 200] [--ismetles 3]
+"""
+import argparse
+import io
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import szintetikus  # noqa: E402
+from ugyelet import UgyeletiBeosztasGenerator  # noqa: E402
+from ugyelet.beolvasas import munkalap_honap  # noqa: E402
+
+
+def regi_beolvasas(file_content):
+    """Az eredeti, munkalaponként újraolvasó iterrows alapú beolvasás"""
+    keresek = {}
+    excel_buffer = io.BytesIO(file_content)
+    xls = pd.ExcelFile(excel_buffer)
+    for sheet_name in xls.sheet_names:
+        ev, honap_szam = munkalap_honap(sheet_name)
+        if not honap_szam:
+            continue
+        df = pd.read_excel(excel_buffer, sheet_name=sheet_name)
+        orvos_oszlop = df.columns[0]
+        for _, row in df.iterrows():
+            orvos_nev = row[orvos_oszlop]
+            if pd.notna(orvos_nev) and isinstance(orvos_nev, str):
+                for nap in range(1, 32):
+                    if str(nap) in df.columns:
+                        status = row[str(nap)]
+                        if pd.notna(status):
+                            keresek.setdefault(ev, {}).setdefault(honap_szam, {}).setdefault(orvos_nev, {})[nap] = status
+    return keresek
+
+
+def meres(fuggveny, ismetles):
+    legjobb = float('inf')
+    eredmeny = None
+    for _ in range(ismetles):
+        kezdet = time.perf_counter()
+        eredmeny = fuggveny()
+        legjobb = min(legjobb, time.perf_counter() - kezdet)
+    return legjobb, eredmeny
+
+
+def uj_beolvasas(file_content, streaming):
+    generator = UgyeletiBeosztasGenerator()
+    if not generator.excel_beolvasas(file_content, streaming=streaming):
+        raise RuntimeError("A beolvasás sikertelen")
+    return generator.keresek.szotar()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--orvosok', type=int, default=200)
+    parser.add_argument('--ismetles', type=int, default=3)
+    args = parser.parse_args()
+    
+    file_content = szintetikus.munkafuzet(args.orvosok)
+    print(f"Munkafüzet: 24 munkalap, {args.orvosok} orvos, {len(file_content) / 1024:.0f} KiB")
+    
+    regi_ido, regi = meres(lambda: regi_beolvasas(file_content), args.ismetles)
+    print(f"régi (iterrows, újranyitás): {regi_ido:8.3f} s")
+    for nev, streaming in [('egymenetes pandas', False), ('streaming openpyxl', True)]:
+        ido, keresek = meres(lambda: uj_beolvasas(file_content, streaming), args.ismetles)
+        egyezik = "egyezik" if keresek == regi else "ELTÉR"
+        print(f"{nev + ':':28s} {ido:8.3f} s  ({regi_ido / ido:5.1f}x, {egyezik})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""Benchmark: beosztás export ideje és csúcs memóriája
+
+Szintetikus több hónapos beosztásokon (forgatókönyvenként) méri a korábbi
+DataFrame + pd.ExcelWriter exportot és az új, csak írható munkafüzetes
+exportot (naptár lapokkal és nélkülük), valamint a CSV és Parquet kimenetet.
+A csúcs memóriát tracemalloc méri, külön futásban.
+
+Futtatás a repó gyökeréből:
+    python benchmarks/export.py [--orvosok 200] [--honapok 12] [--forgatokonyvek 4]
+"""
+import argparse
+import io
+import os
+import sys
+import time
+import tracemalloc
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import szintetikus  # noqa: E402
+from ugyelet.export import beosztas_tabla, kotegelt_export  # noqa: E402
+from ugyelet.kotegelt import KotegEredmeny  # noqa: E402
+
+
+def regi_export(eredmenyek, kimenet):
+    """A korábbi export: minden tábla DataFrame, majd pd.ExcelWriter (openpyxl)"""
+    beosztas_reszek = []
+    statisztika = {}
+    for eredmeny in eredmenyek:
+        for beosztas in eredmeny.beosztasok.values():
+            tabla = beosztas_tabla(beosztas)
+            tabla.insert(0, 'Forgatókönyv', eredmeny.nev)
+            beosztas_reszek.append(tabla)
+        statisztika[eredmeny.nev] = pd.Series(eredmeny.ugyeletszamok)
+    beosztas_df = pd.concat(beosztas_reszek, ignore_index=True)
+    statisztika_df = pd.DataFrame(statisztika).rename_axis('Orvos').reset_index()
+    with pd.ExcelWriter(kimenet, engine='openpyxl') as writer:
+        beosztas_df.to_excel(writer, sheet_name='Beosztás', index=False)
+        statisztika_df.to_excel(writer, sheet_name='Statisztika', index=False)
+
+
+def eredmenyek(args):
+    eredmeny_lista = []
+    for i in range(args.forgatokonyvek):
+        beosztasok = szintetikus.beosztasok(args.orvosok, args.honapok, seed=args.seed + i)
+        szamok = dict.fromkeys(szintetikus.nevsor(args.orvosok), 0)
+        for beosztas in beosztasok.values():
+            for orvosok in beosztas.values():
+                for orvos in orvosok:
+                    szamok[orvos] += 1
+        eredmeny_lista.append(KotegEredmeny(f"forgatókönyv {i + 1}", beosztasok, szamok, []))
+    return eredmeny_lista
+
+
+def meres(fuggveny, ismetles):
+    legjobb = float('inf')
+    meret = 0
+    for _ in range(ismetles):
+        kimenet = io.BytesIO()
+        kezdet = time.perf_counter()
+        fuggveny(kimenet)
+        legjobb = min(legjobb, time.perf_counter() - kezdet)
+        meret = len(kimenet.getvalue())
+    tracemalloc.start()
+    try:
+        fuggveny(io.BytesIO())
+        _, csucs = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return legjobb, csucs, meret
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--orvosok', type=int, default=200)
+    parser.add_argument('--honapok', type=int, default=12)
+    parser.add_argument('--forgatokonyvek', type=int, default=4)
+    parser.add_argument('--ismetles', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    adatok = eredmenyek(args)
+    valtozatok = [
+        ('régi (pd.ExcelWriter)', lambda k: regi_export(adatok, k)),
+        ('xlsx, csak írható', lambda k: kotegelt_export(adatok, k, 'xlsx', naptar=False)),
+        ('xlsx, naptár lapokkal', lambda k: kotegelt_export(adatok, k, 'xlsx')),
+        ('csv', lambda k: kotegelt_export(adatok, k, 'csv')),
+        ('parquet', lambda k: kotegelt_export(adatok, k, 'parquet')),
+    ]
+    print(f"{args.forgatokonyvek} forgatókönyv, {args.honapok} hónap, {args.orvosok} orvos")
+    print(f"{'export':24s} {'idő (s)':>9} {'csúcs MiB':>10} {'méret KiB':>10}")
+    for nev, fuggveny in valtozatok:
+        try:
+            ido, csucs, meret = meres(fuggveny, args.ismetles)
+        except ImportError as e:
+            print(f"{nev:24s} kihagyva ({e})")
+            continue
+        print(f"{nev:24s} {ido:>9.3f} {csucs / 2 ** 20:>10.1f} {meret / 1024:>10.0f}")
+
+
+if __name__ == '__main__':
+    main()
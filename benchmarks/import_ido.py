@@ -0,0 +1,60 @@
+"""Hidegindítási idő: mennyi ideig tart az egyes belépési pontok importja
+
+Minden mérés friss Python folyamatban fut; kiírja a legjobb időt és azt,
+hogy a nagy függőségek közül melyek töltődtek be.
+
+Futtatás a repó gyökeréből:
+    python benchmarks/import_ido.py [--ismetles 5]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+GYOKER = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+NEHEZ_FUGGOSEGEK = ['numpy', 'pandas', 'openpyxl', 'ortools', 'streamlit', 'transformers']
+BELEPESI_PONTOK = [
+    'ugyelet',
+    'ugyelet.generator',
+    'ugyelet.kotegelt',
+    'ugyelet.beolvasas',
+    'app',
+]
+
+MERO_PROGRAM = """
+import json, sys, time
+kezdet = time.perf_counter()
+import {modul}
+ido = time.perf_counter() - kezdet
+betoltott = [nev for nev in {nehez!r} if nev in sys.modules]
+print(json.dumps({{'ido': ido, 'betoltott': betoltott}}))
+"""
+
+
+def meres(modul, ismetles):
+    program = MERO_PROGRAM.format(modul=modul, nehez=NEHEZ_FUGGOSEGEK)
+    legjobb = None
+    for _ in range(ismetles):
+        kimenet = subprocess.run(
+            [sys.executable, '-c', program], cwd=GYOKER, capture_output=True, text=True, check=True
+        ).stdout
+        eredmeny = json.loads(kimenet.strip().splitlines()[-1])
+        if legjobb is None or eredmeny['ido'] < legjobb['ido']:
+            legjobb = eredmeny
+    return legjobb
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--ismetles', type=int, default=5)
+    args = parser.parse_args()
+
+    for modul in BELEPESI_PONTOK:
+        eredmeny = meres(modul, args.ismetles)
+        betoltott = ', '.join(eredmeny['betoltott']) or '-'
+        print(f"{modul:22s} {eredmeny['ido'] * 1000:8.1f} ms   {betoltott}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""Benchmark: mohó, CP-SAT és többszöri indításos beosztás szintetikus névsorokon
+
+Névsoronként méri a megoldási időt, a lefedettséget (betöltött helyek aránya)
+és az ügyeletszámok szórását. A szűkös elérhetőség (naponta átlagosan
+néhány elérhető orvos) és a sok párosítási tiltás az a helyzet, ahol a
+mohó kiválasztás napokat hagy kettőnél kevesebb orvossal.
+
+Futtatás a repó gyökeréből:
+    python benchmarks/megoldok.py [--orvosok 50 100 200 300] [--idokorlat 10]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import szintetikus  # noqa: E402
+from ugyelet import optimalis_beosztas  # noqa: E402
+
+EV, HONAP = 2024, 3
+
+
+def futtatas(generator, megoldo, **beallitasok):
+    kezdo = optimalis_beosztas.ugyeletszamok(generator)
+    kezdet = time.perf_counter()
+    beosztas, _ = optimalis_beosztas.MEGOLDOK[megoldo](generator, EV, HONAP, **beallitasok)
+    ido = time.perf_counter() - kezdet
+    hiany, _ = optimalis_beosztas.ertekeles(beosztas, kezdo)
+    helyek = optimalis_beosztas.NAPI_LETSZAM * len(beosztas)
+    szamok = dict(kezdo)
+    for orvosok in beosztas.values():
+        for orvos in orvosok:
+            szamok[orvos] += 1
+    return ido, 1 - hiany / helyek, statistics.pstdev(szamok.values())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--orvosok', type=int, nargs='+', default=[50, 100, 200, 300])
+    parser.add_argument('--napi-elerheto', type=float, default=4)
+    parser.add_argument('--idokorlat', type=float, default=10.0)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'orvosok':>8} {'megoldó':>11} {'idő (s)':>9} {'lefedettség':>12} {'szórás':>8}")
+    for orvosok_szama in args.orvosok:
+        generator = szintetikus.generator(orvosok_szama, args.napi_elerheto, EV, HONAP, args.seed)
+        for megoldo, beallitasok in [
+            ('moho', {}),
+            ('cpsat', {'idokorlat': args.idokorlat, 'seed': args.seed}),
+            ('tobbinditas', {'idokorlat': args.idokorlat, 'seed': args.seed}),
+        ]:
+            ido, lefedettseg, szoras = futtatas(generator, megoldo, **beallitasok)
+            print(f"{orvosok_szama:>8} {megoldo:>11} {ido:>9.3f} {lefedettseg:>11.1%} {szoras:>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
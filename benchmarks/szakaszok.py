@@ -0,0 +1,217 @@
+"""A generálás szakaszainak benchmarkja géppel olvasható JSON eredménnyel
+
+Szintetikus (determinisztikus) bemeneten külön méri:
+    excel_beolvasas             munkafüzet beolvasása (pandas)
+    excel_beolvasas_streaming   ugyanez csak olvasható openpyxl módban
+    kivetel_hozzaadas           kivétel szöveg elemzése, hideg gyorsítótárral
+    elerheto_orvosok            elérhetőségi mátrixok és napi lekérdezések minden napra
+    beosztas_generalas          az összes hónap mohó beosztása időrendben
+    export                      a teljes beosztás Excel exportja
+
+Szakaszonként a legjobb és a medián időt, valamint a csúcs memóriát
+(tracemalloc, külön futásban, hogy az időmérést ne lassítsa) rögzíti.
+Két futás összevethető: --osszehasonlitas regi.json kiírja az arányokat,
+és --tures mellett hibakóddal lép ki, ha valamelyik szakasz lassult.
+
+Futtatás a repó gyökeréből:
+    python benchmarks/szakaszok.py --orvosok 200 --honapok 24 --kimenet eredmeny.json
+    python benchmarks/szakaszok.py --osszehasonlitas eredmeny.json --tures 0.2
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from collections import namedtuple
+from datetime import date, datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import szintetikus  # noqa: E402
+from ugyelet import GyujtoDiagnosztika, UgyeletiBeosztasGenerator, kivetel_elemzo  # noqa: E402
+from ugyelet.beolvasas import munkalap_honap  # noqa: E402
+from ugyelet.export import kotegelt_export  # noqa: E402
+from ugyelet.kotegelt import KotegEredmeny  # noqa: E402
+
+Szakasz = namedtuple('Szakasz', ['nev', 'elokeszites', 'meres'])
+Bemenet = namedtuple('Bemenet', ['munkafuzet', 'kivetelek', 'parok', 'honapok'])
+
+
+def bemenet(args):
+    return Bemenet(
+        szintetikus.munkafuzet(args.orvosok, args.honapok, args.kitoltottseg, args.seed),
+        szintetikus.kivetel_szoveg(args.orvosok, args.kivetelek, args.honapok, args.seed),
+        szintetikus.parositasok(args.orvosok, args.parok, args.seed),
+        sorted(munkalap_honap(lap) for lap in szintetikus.munkalapok(args.honapok)),
+    )
+
+
+def szakaszok(adatok):
+    """A mért szakaszok; az előkészítés eredményét kapja a mérendő függvény"""
+    alap = UgyeletiBeosztasGenerator(GyujtoDiagnosztika())
+    alap.excel_beolvasas(adatok.munkafuzet)
+    pillanatkep = alap.pillanatkep()
+
+    def uj_generator():
+        return UgyeletiBeosztasGenerator(GyujtoDiagnosztika())
+
+    def kivetelekkel():
+        generator = UgyeletiBeosztasGenerator.pillanatkepbol(pillanatkep, GyujtoDiagnosztika())
+        generator.kivetel_hozzaadas(adatok.kivetelek)
+        for egyik, masik in adatok.parok:
+            generator.szabaly_hozzaadas(kivetel_elemzo.ParTiltas(egyik, masik))
+        return generator
+
+    def kivetel_elokeszites():
+        kivetel_elemzo.sor_elemzes.cache_clear()
+        return UgyeletiBeosztasGenerator.pillanatkepbol(pillanatkep, GyujtoDiagnosztika())
+
+    def elerhetoseg(generator):
+        for ev, honap in adatok.honapok:
+            for nap in range(1, len(generator.elerhetosegi_matrix(ev, honap)[0]) + 1):
+                generator.elerheto_orvosok(date(ev, honap, nap))
+
+    def generalas(generator):
+        return {
+            (ev, honap): generator.beosztas_keszites(ev, honap)[0] for ev, honap in adatok.honapok
+        }
+
+    def export_elokeszites():
+        generator = kivetelekkel()
+        beosztasok = generalas(generator)
+        szamok = {orvos: adat['ugyeletek_szama'] for orvos, adat in generator.orvosok.items()}
+        return KotegEredmeny('benchmark', beosztasok, szamok, [])
+
+    return [
+        Szakasz('excel_beolvasas', uj_generator,
+                lambda g: g.excel_beolvasas(adatok.munkafuzet)),
+        Szakasz('excel_beolvasas_streaming', uj_generator,
+                lambda g: g.excel_beolvasas(adatok.munkafuzet, streaming=True)),
+        Szakasz('kivetel_hozzaadas', kivetel_elokeszites,
+                lambda g: g.kivetel_hozzaadas(adatok.kivetelek)),
+        Szakasz('elerheto_orvosok', kivetelekkel, elerhetoseg),
+        Szakasz('beosztas_generalas', kivetelekkel, generalas),
+        Szakasz('export', export_elokeszites,
+                lambda eredmeny: kotegelt_export([eredmeny], io.BytesIO())),
+    ]
+
+
+def szakasz_meres(szakasz, ismetles):
+    idok = []
+    for _ in range(ismetles):
+        allapot = szakasz.elokeszites()
+        kezdet = time.perf_counter()
+        szakasz.meres(allapot)
+        idok.append(time.perf_counter() - kezdet)
+
+    allapot = szakasz.elokeszites()
+    tracemalloc.start()
+    try:
+        szakasz.meres(allapot)
+        _, csucs = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        'legjobb_s': min(idok),
+        'median_s': statistics.median(idok),
+        'idok_s': idok,
+        'csucs_memoria_mb': csucs / 2 ** 20,
+    }
+
+
+def _verzio(modul):
+    try:
+        return __import__(modul).__version__
+    except ImportError:
+        return None
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def osszehasonlitas(regi, uj, tures):
+    """Arányok kiírása; igaz, ha minden szakasz a tűréshatáron belül maradt"""
+    rendben = True
+    print(f"\n{'szakasz':28s} {'régi (s)':>10} {'új (s)':>10} {'arány':>7}")
+    for nev, eredmeny in uj['szakaszok'].items():
+        if nev not in regi['szakaszok']:
+            continue
+        regi_ido = regi['szakaszok'][nev]['legjobb_s']
+        arany = eredmeny['legjobb_s'] / regi_ido if regi_ido else float('inf')
+        jelzes = ''
+        if tures is not None and arany > 1 + tures:
+            jelzes = '  LASSULT'
+            rendben = False
+        print(f"{nev:28s} {regi_ido:>10.4f} {eredmeny['legjobb_s']:>10.4f} {arany:>6.2f}x{jelzes}")
+    return rendben
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--orvosok', type=int, default=200)
+    parser.add_argument('--honapok', type=int, default=24, help="munkalapok száma (legfeljebb 24)")
+    parser.add_argument('--kitoltottseg', type=float, default=0.3, help="kitöltött kérés cellák aránya")
+    parser.add_argument('--kivetelek', type=int, default=500, help="kivétel sorok száma")
+    parser.add_argument('--parok', type=int, default=50, help="tiltott párok száma")
+    parser.add_argument('--ismetles', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--szakasz', action='append', help="csak a megadott szakasz(ok) mérése")
+    parser.add_argument('--kimenet', help="az eredmény JSON fájl útvonala")
+    parser.add_argument('--osszehasonlitas', help="korábbi eredmény JSON az összevetéshez")
+    parser.add_argument('--tures', type=float, help="megengedett lassulás aránya, pl. 0.2 = 20%%")
+    args = parser.parse_args()
+
+    adatok = bemenet(args)
+    eredmeny = {
+        'meta': {
+            'idopont': datetime.now().isoformat(timespec='seconds'),
+            'git_commit': _git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'csomagok': {modul: _verzio(modul) for modul in ['numpy', 'pandas', 'openpyxl']},
+            'parameterek': {
+                'orvosok': args.orvosok, 'honapok': args.honapok,
+                'kitoltottseg': args.kitoltottseg, 'kivetelek': args.kivetelek,
+                'parok': args.parok, 'ismetles': args.ismetles, 'seed': args.seed,
+            },
+        },
+        'szakaszok': {},
+    }
+
+    print(f"{'szakasz':28s} {'legjobb (s)':>12} {'medián (s)':>12} {'csúcs MiB':>10}")
+    for szakasz in szakaszok(adatok):
+        if args.szakasz and szakasz.nev not in args.szakasz:
+            continue
+        meres = szakasz_meres(szakasz, args.ismetles)
+        eredmeny['szakaszok'][szakasz.nev] = meres
+        print(f"{szakasz.nev:28s} {meres['legjobb_s']:>12.4f} {meres['median_s']:>12.4f} "
+              f"{meres['csucs_memoria_mb']:>10.1f}")
+
+    if args.kimenet:
+        with open(args.kimenet, 'w', encoding='utf-8') as f:
+            json.dump(eredmeny, f, ensure_ascii=False, indent=2)
+
+    if args.osszehasonlitas:
+        with open(args.osszehasonlitas, encoding='utf-8') as f:
+            regi = json.load(f)
+        if regi['meta']['parameterek'] != eredmeny['meta']['parameterek']:
+            print("Figyelem: a két futás paraméterei eltérnek", file=sys.stderr)
+        if not osszehasonlitas(regi, eredmeny, args.tures):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
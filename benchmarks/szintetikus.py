@@ -0,0 +1,127 @@
+"""Determinisztikus szintetikus adatok a benchmarkokhoz
+
+Azonos paraméterekkel és seeddel mindig ugyanazt a bemenetet adja:
+    munkafuzet()        kérés-munkafüzet a valódi elrendezésben ("március",
+                        "25 január" munkalapok, "1".."31" nap oszlopok)
+    kivetel_szoveg()    szabad szöveges kivételek (egyes napok, tartományok,
+                        hét napjai, párosítási sorok)
+    parositasok()       tiltott orvospárok a névsor neveivel
+    beosztasok()        kész havi beosztások (napi két orvos) az exporthoz
+    generator()         kész generátor egy hónap szűkös elérhetőségével
+
+A kivétel szövegben a neveket "Dr. Orvos001" alakban írjuk, ahogy az elemző
+az orvos nevét a sor első két szavából veszi. A párosítási sorok elemzése
+így mérhető, a tiltott párokat viszont (mivel az elemző a második nevet három
+szóból olvassa) a parositasok() listájával adjuk át a generátornak.
+"""
+import calendar
+import io
+import os
+import random
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ugyelet import UgyeletiBeosztasGenerator  # noqa: E402
+from ugyelet.beolvasas import HONAPOK, munkalap_honap  # noqa: E402
+
+STATUSZOK = ["Szabadság", "Ne ügyeljen", "Ügyelne"]
+HETNAPOK = ['hétfőn', 'kedden', 'szerdán', 'csütörtökön', 'pénteken', 'szombaton', 'vasárnap']
+INDOKOK = ['szabadság', 'konferencia', 'tanfolyam', 'beteg']
+MUNKALAPOK = list(HONAPOK) + [f"25 {honap}" for honap in HONAPOK]
+
+
+def nevsor(orvosok_szama):
+    return [f"Dr. Orvos{i:03d}" for i in range(orvosok_szama)]
+
+
+def munkalapok(honapok_szama):
+    """Az első honapok_szama munkalap neve (legfeljebb 24: 2024 és "25 ..." 2025)"""
+    return MUNKALAPOK[:honapok_szama]
+
+
+def munkafuzet(orvosok_szama=200, honapok_szama=24, kitoltottseg=0.3, seed=0):
+    """Kérés-munkafüzet bájtokban; a cellák kitoltottseg aránya tartalmaz státuszt"""
+    rnd = random.Random(seed)
+    nevek = nevsor(orvosok_szama)
+    buffer = io.BytesIO()
+    with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
+        for lap in munkalapok(honapok_szama):
+            sorok = []
+            for nev in nevek:
+                sor = {'Név': nev}
+                for nap in range(1, 32):
+                    sor[str(nap)] = rnd.choice(STATUSZOK) if rnd.random() < kitoltottseg else None
+                sorok.append(sor)
+            pd.DataFrame(sorok).to_excel(writer, sheet_name=lap, index=False)
+    return buffer.getvalue()
+
+
+def kivetel_szoveg(orvosok_szama=200, sorok_szama=500, honapok_szama=24, seed=0):
+    """Vegyes kivétel szöveg a munkafüzet hónapjaira"""
+    rnd = random.Random(seed)
+    nevek = nevsor(orvosok_szama)
+    honapok = [munkalap_honap(lap) for lap in munkalapok(honapok_szama)]
+    honap_nevek = list(HONAPOK)
+    sorok = []
+    for _ in range(sorok_szama):
+        nev = rnd.choice(nevek)
+        ev, honap = rnd.choice(honapok)
+        napok_szama = calendar.monthrange(ev, honap)[1]
+        nap = rnd.randint(1, napok_szama)
+        tipus = rnd.random()
+        if tipus < 0.5:
+            sorok.append(f"{nev} {ev}.{honap:02d}.{nap:02d} {rnd.choice(INDOKOK)}")
+        elif tipus < 0.8:
+            veg = min(napok_szama, nap + rnd.randint(1, 14))
+            sorok.append(f"{nev} {ev} {honap_nevek[honap - 1]} {nap}-{veg} között {rnd.choice(INDOKOK)}")
+        elif tipus < 0.9:
+            napok = rnd.sample(HETNAPOK, rnd.randint(1, 3))
+            sorok.append(f"{nev} csak {' és '.join(napok)} tud dolgozni.")
+        else:
+            sorok.append(f"{nev} nem dolgozhat {rnd.choice(nevek)} Doktorral.")
+    return '\n'.join(sorok)
+
+
+def parositasok(orvosok_szama=200, parok_szama=50, seed=0):
+    """Tiltott orvospárok a névsor neveivel"""
+    rnd = random.Random(seed)
+    nevek = nevsor(orvosok_szama)
+    return [tuple(rnd.sample(nevek, 2)) for _ in range(parok_szama)]
+
+
+def beosztasok(orvosok_szama=200, honapok_szama=12, ev=2024, seed=0):
+    """{(év, hónap): {dátum szöveg: [két orvos]}} egymást követő hónapokra, januártól"""
+    rnd = random.Random(seed)
+    nevek = nevsor(orvosok_szama)
+    eredmeny = {}
+    for i in range(honapok_szama):
+        ho_ev, honap = ev + i // 12, i % 12 + 1
+        eredmeny[ho_ev, honap] = {
+            f"{ho_ev}-{honap:02d}-{nap:02d}": rnd.sample(nevek, 2)
+            for nap in range(1, calendar.monthrange(ho_ev, honap)[1] + 1)
+        }
+    return eredmeny
+
+
+def generator(orvosok_szama, napi_elerheto=4, ev=2024, honap=3, seed=0):
+    """Generátor egy hónap véletlen kéréseivel és párosítási tiltásaival (Excel nélkül)
+
+    napi_elerheto: ennyi orvos érhető el átlagosan egy napon
+    """
+    rnd = random.Random(seed)
+    generator = UgyeletiBeosztasGenerator()
+    nevek = nevsor(orvosok_szama)
+    napok_szama = calendar.monthrange(ev, honap)[1]
+    esely = min(1.0, napi_elerheto / orvosok_szama)
+    for nev in nevek:
+        generator.orvosok[nev] = {'nev': nev, 'ugyeletek_szama': rnd.randint(0, 3)}
+        for nap in range(1, napok_szama + 1):
+            if rnd.random() >= esely:
+                generator.keresek.hozzaadas(ev, honap, nev, nap, 'Szabadság')
+    for _ in range(orvosok_szama):
+        egyik, masik = rnd.sample(nevek, 2)
+        generator.korlatozasok.par_tiltas(egyik, masik)
+    return generator
@@ -0,0 +1,34 @@
+"""Ügyeleti beosztás generálása, Streamlit nélkül is használható mag
+
+A nevek első használatkor töltődnek be, így a csomag importja nem húzza be
+a numpy/pandas/openpyxl/ortools függőségeket, csak ami ténylegesen kell.
+
+    from ugyelet import UgyeletiBeosztasGenerator
+    python -m ugyelet keresek.xlsx --tol 2024-03 --kivetelek k.txt --kimenet marcius.xlsx
+"""
+import importlib
+
+_EXPORTOK = {
+    'UgyeletiBeosztasGenerator': 'generator',
+    'MunkafuzetCache': 'generator',
+    'BeolvasottKeresek': 'generator',
+    'KeresTar': 'keresek',
+    'KorlatozasTar': 'korlatozasok',
+    'NaploDiagnosztika': 'diagnosztika',
+    'GyujtoDiagnosztika': 'diagnosztika',
+    'Meres': 'meres',
+    'Nyilvantartas': 'nyilvantartas',
+    'MEGOLDOK': 'optimalis_beosztas',
+    'beosztas_tabla': 'export',
+}
+
+__all__ = list(_EXPORTOK)
+
+
+def __getattr__(nev):
+    modul = _EXPORTOK.get(nev)
+    if modul is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {nev!r}")
+    ertek = getattr(importlib.import_module(f'.{modul}', __name__), nev)
+    globals()[nev] = ertek
+    return ertek
@@ -0,0 +1,6 @@
+"""python -m ugyelet: beosztás generálása parancssorból (lásd ugyelet.kotegelt)"""
+import sys
+
+from .kotegelt import main
+
+sys.exit(main())
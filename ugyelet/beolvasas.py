@@ -0,0 +1,112 @@
+"""Ügyeleti kérések beolvasása Excel munkafüzetből
+
+Minden hónap munkalapot pontosan egyszer olvasunk be, és egy hosszú
+(év, hónap, orvos, nap, státusz) táblává alakítunk.
+"""
+import io
+
+import pandas as pd
+
+HONAPOK = {
+    'január': 1, 'február': 2, 'március': 3, 'április': 4,
+    'május': 5, 'június': 6, 'július': 7, 'augusztus': 8,
+    'szeptember': 9, 'október': 10, 'november': 11, 'december': 12
+}
+NAP_OSZLOPOK = [str(nap) for nap in range(1, 32)]
+KERES_OSZLOPOK = ['ev', 'honap', 'orvos', 'nap', 'status']
+
+
+def munkalap_honap(sheet_name):
+    """Év és hónap meghatározása a munkalap nevéből (pl. "március", "25 január")"""
+    if sheet_name.startswith('25 '):
+        return 2025, HONAPOK.get(sheet_name.split(' ')[1].lower())
+    return 2024, HONAPOK.get(sheet_name.lower())
+
+
+def munkalap_nev(ev, honap):
+    """A munkalap neve az (év, hónap)-hoz, a munkalap_honap fordítottja"""
+    nev = next(nev for nev, szam in HONAPOK.items() if szam == honap)
+    return nev if ev == 2024 else f"{ev % 100} {nev}"
+
+
+def _hosszu_tabla(df, ev, honap):
+    """Egy munkalap átalakítása hosszú (év, hónap, orvos, nap, státusz) táblává"""
+    orvos_oszlop = df.iloc[:, 0]
+    nev_maszk = orvos_oszlop.map(lambda ertek: isinstance(ertek, str)).to_numpy(dtype=bool)
+    nap_oszlopok = [oszlop for oszlop in NAP_OSZLOPOK if oszlop in df.columns]
+    orvos_nevek = list(dict.fromkeys(orvos_oszlop[nev_maszk].tolist()))
+    
+    napok = df.loc[nev_maszk, nap_oszlopok]
+    napok.index = pd.Index(orvos_oszlop[nev_maszk].to_numpy(), name='orvos')
+    hosszu = napok.reset_index().melt(
+        id_vars='orvos', var_name='nap', value_name='status'
+    ).dropna(subset=['status'])
+    hosszu['nap'] = hosszu['nap'].astype(int)
+    hosszu.insert(0, 'honap', honap)
+    hosszu.insert(0, 'ev', ev)
+    return orvos_nevek, hosszu[KERES_OSZLOPOK]
+
+
+def _munkalapok_pandas(excel_buffer):
+    """Hónap munkalapok beolvasása pandas-szal, mindegyik pontosan egyszer"""
+    with pd.ExcelFile(excel_buffer) as xls:
+        for sheet_name in xls.sheet_names:
+            ev, honap = munkalap_honap(sheet_name)
+            if honap:
+                yield _hosszu_tabla(xls.parse(sheet_name), ev, honap)
+
+
+def _munkalapok_streaming(excel_buffer):
+    """Hónap munkalapok soronkénti olvasása csak olvasható openpyxl módban"""
+    from openpyxl import load_workbook
+    
+    wb = load_workbook(excel_buffer, read_only=True, data_only=True)
+    try:
+        for ws in wb.worksheets:
+            ev, honap = munkalap_honap(ws.title)
+            if not honap:
+                continue
+            sorok = ws.iter_rows(values_only=True)
+            fejlec = next(sorok, None)
+            if not fejlec:
+                continue
+            nap_indexek = [
+                (i, int(oszlop)) for i, oszlop in enumerate(fejlec)
+                if i > 0 and oszlop in NAP_OSZLOPOK
+            ]
+            
+            orvos_nevek = {}
+            rekordok = []
+            for sor in sorok:
+                orvos_nev = sor[0] if sor else None
+                if not isinstance(orvos_nev, str):
+                    continue
+                orvos_nevek.setdefault(orvos_nev, None)
+                for i, nap in nap_indexek:
+                    if i < len(sor) and sor[i] is not None:
+                        rekordok.append((ev, honap, orvos_nev, nap, sor[i]))
+            yield list(orvos_nevek), pd.DataFrame.from_records(rekordok, columns=KERES_OSZLOPOK)
+    finally:
+        wb.close()
+
+
+def munkafuzet_beolvasas(file_content, streaming=False):
+    """A munkafüzet orvosai (első előfordulásuk sorrendjében) és a kérések hosszú táblája
+    
+    Nagyon nagy fájloknál a streaming=True csak olvasható openpyxl módot használ.
+    """
+    with io.BytesIO(file_content) as excel_buffer:
+        if streaming:
+            munkalapok = _munkalapok_streaming(excel_buffer)
+        else:
+            munkalapok = _munkalapok_pandas(excel_buffer)
+        
+        orvos_nevek = {}
+        reszek = []
+        for nevek, hosszu in munkalapok:
+            orvos_nevek.update(dict.fromkeys(nevek))
+            reszek.append(hosszu)
+    
+    if not reszek:
+        return list(orvos_nevek), pd.DataFrame(columns=KERES_OSZLOPOK)
+    return list(orvos_nevek), pd.concat(reszek, ignore_index=True)
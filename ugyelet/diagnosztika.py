@@ -0,0 +1,34 @@
+"""Hibák és figyelmeztetések kimenetei
+
+A generátor nem függ a Streamlittől: a hibákat és figyelmeztetéseket egy
+diagnosztika objektumnak adja át, amelynek hiba(uzenet) és
+figyelmeztetes(uzenet) metódusa van. A Streamlit oldal a saját
+kimenetét adja meg, parancssorból és könyvtárként a naplózás az alapértelmezés.
+"""
+import logging
+
+naplo = logging.getLogger('ugyelet')
+
+
+class NaploDiagnosztika:
+    """Üzenetek a logging modulba ('ugyelet' napló)"""
+    def __init__(self, logger=naplo):
+        self.logger = logger
+
+    def hiba(self, uzenet):
+        self.logger.error(uzenet)
+
+    def figyelmeztetes(self, uzenet):
+        self.logger.warning(uzenet)
+
+
+class GyujtoDiagnosztika:
+    """Üzenetek összegyűjtése (szint, üzenet) párokként, pl. későbbi megjelenítéshez"""
+    def __init__(self):
+        self.uzenetek = []
+
+    def hiba(self, uzenet):
+        self.uzenetek.append(('hiba', uzenet))
+
+    def figyelmeztetes(self, uzenet):
+        self.uzenetek.append(('figyelmeztetes', uzenet))
@@ -0,0 +1,236 @@
+"""Beosztások táblázatos formája és exportja
+
+Az Excel kimenet csak írható (write_only) openpyxl munkafüzetként, soronként
+készül: nem épül fel a teljes munkafüzet a memóriában, és a beosztásból
+sem kell előbb DataFrame-et készíteni. A naptár munkalapok a bemenet
+elrendezését követik (hónaponként egy lap, orvosonként egy sor, "1".."31"
+nap oszlopok). CSV-be és Parquet-be csak a beosztás tábla kerül.
+"""
+import calendar
+import csv
+import io
+import math
+from datetime import date
+from numbers import Number
+
+import pandas as pd
+
+from .beolvasas import munkalap_nev
+from .muszakok import MuszakBeosztas, napi_beosztasok
+from .optimalis_beosztas import NAPI_LETSZAM
+
+UGYELET_JEL = "Ügyelet"
+FORMATUMOK = ('xlsx', 'csv', 'parquet')
+SORSZAMOK = ['Első', 'Második', 'Harmadik', 'Negyedik', 'Ötödik', 'Hatodik', 'Hetedik', 'Nyolcadik']
+
+
+def orvos_oszlopok(letszam=NAPI_LETSZAM):
+    """Az orvos oszlopok nevei: Első Orvos, Második Orvos, ..."""
+    return [
+        f"{SORSZAMOK[i]} Orvos" if i < len(SORSZAMOK) else f"{i + 1}. Orvos"
+        for i in range(letszam)
+    ]
+
+
+def beosztas_letszam(beosztas):
+    """A táblázathoz szükséges orvos oszlopok száma (legalább a napi két orvos)"""
+    return max([NAPI_LETSZAM] + [len(orvosok) for _, _, orvosok in napi_beosztasok(beosztas)])
+
+
+def beosztas_fejlec(letszam=NAPI_LETSZAM, muszakos=False):
+    return ['Dátum'] + (['Műszak'] if muszakos else []) + orvos_oszlopok(letszam)
+
+
+def beosztas_sorok(beosztas, letszam=NAPI_LETSZAM, muszakos=False):
+    """A beosztás (dátum, [műszak,] első orvos, második orvos, ...) sorai dátum szerint"""
+    for datum, muszak, orvosok in napi_beosztasok(beosztas):
+        helyek = list(orvosok[:letszam]) + [None] * (letszam - len(orvosok))
+        yield (datum, muszak, *helyek) if muszakos else (datum, *helyek)
+
+
+def beosztas_tabla_adatok(beosztas):
+    """A beosztás táblázatának fejléce és sorai (több műszaknál Műszak oszloppal)"""
+    muszakos = isinstance(beosztas, MuszakBeosztas)
+    letszam = beosztas_letszam(beosztas)
+    return beosztas_fejlec(letszam, muszakos), beosztas_sorok(beosztas, letszam, muszakos)
+
+
+def beosztas_tabla(beosztas):
+    """A beosztás Dátum / Első Orvos / Második Orvos ... táblázatként, dátum szerint rendezve"""
+    fejlec, sorok = beosztas_tabla_adatok(beosztas)
+    return pd.DataFrame(list(sorok), columns=fejlec)
+
+
+def kimeneti_formatum(kimenet, formatum=None):
+    """A kimenet formátuma: megadva, vagy a fájl kiterjesztéséből (alapból xlsx)"""
+    if formatum is None and isinstance(kimenet, str):
+        formatum = kimenet.rsplit('.', 1)[-1].lower() if '.' in kimenet else None
+    if formatum not in FORMATUMOK:
+        formatum = 'xlsx'
+    return formatum
+
+
+def _cella(ertek):
+    """Érték átalakítása Excel cellához (üres, szám, szöveg)"""
+    if ertek is None or (isinstance(ertek, float) and math.isnan(ertek)):
+        return None
+    if isinstance(ertek, (str, Number, date)):
+        return ertek.item() if hasattr(ertek, 'item') else ertek
+    return str(ertek)
+
+
+def tabla_lap(nev, df):
+    """Egy DataFrame munkalapként: (név, fejléc, sorok)"""
+    return nev, list(df.columns), df.itertuples(index=False, name=None)
+
+
+def _naptar_sorok(orvosok, orvos_napok, napok_szama):
+    for orvos in orvosok:
+        napok = orvos_napok.get(orvos, {})
+        yield [orvos] + [napok.get(nap) for nap in range(1, napok_szama + 1)]
+
+
+def naptar_lapok(beosztasok, orvosok=None, elotag=''):
+    """Hónaponként egy naptár munkalap: orvosonként egy sor, ügyeletes napokon jelöléssel
+
+    beosztasok: {(év, hónap): beosztás}; több műszaknál a cellában a műszak neve áll
+    orvosok: a sorok sorrendje (a bemenet sorrendje); alapból a beosztott orvosok névsorban
+    """
+    for ev, honap in sorted(beosztasok):
+        napok_szama = calendar.monthrange(ev, honap)[1]
+        orvos_napok = {}
+        for datum, muszak, napi in napi_beosztasok(beosztasok[ev, honap]):
+            nap = int(datum[-2:])
+            for orvos in napi:
+                orvos_napok.setdefault(orvos, {})[nap] = muszak or UGYELET_JEL
+        sorok = _naptar_sorok(
+            sorted(orvos_napok) if orvosok is None else orvosok, orvos_napok, napok_szama
+        )
+        hetvege = {
+            nap for nap in range(1, napok_szama + 1) if calendar.weekday(ev, honap, nap) >= 5
+        }
+        fejlec = ['Név'] + [str(nap) for nap in range(1, napok_szama + 1)]
+        yield (elotag + munkalap_nev(ev, honap))[:31], fejlec, sorok, hetvege
+
+
+def munkafuzet_iras(kimenet, lapok, naptarak=()):
+    """Csak írható munkafüzet soronkénti írása útvonalra vagy bináris fájlba
+
+    lapok: (név, fejléc, sorok) hármasok
+    naptarak: naptar_lapok() elemei, formázott fejléccel és kiemelt ügyelet cellákkal
+    """
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Alignment, Font, PatternFill
+
+    wb = Workbook(write_only=True)
+    felkover = Font(bold=True)
+    for nev, fejlec, sorok in lapok:
+        ws = wb.create_sheet(nev)
+        ws.append(fejlec)
+        for sor in sorok:
+            ws.append([_cella(ertek) for ertek in sor])
+
+    ugyelet_kitoltes = PatternFill('solid', start_color='C6EFCE')
+    hetvege_kitoltes = PatternFill('solid', start_color='DDDDDD')
+    kozepre = Alignment(horizontal='center')
+    for nev, fejlec, sorok, hetvege in naptarak:
+        ws = wb.create_sheet(nev)
+        ws.freeze_panes = 'B2'
+        ws.column_dimensions['A'].width = 24
+        fejlec_cellak = []
+        for i, cim in enumerate(fejlec):
+            cella = WriteOnlyCell(ws, value=cim)
+            cella.font = felkover
+            if i and i in hetvege:
+                cella.fill = hetvege_kitoltes
+            fejlec_cellak.append(cella)
+        ws.append(fejlec_cellak)
+        # A stílusos cellák értékenként újrahasználhatók, a sorok csak hivatkoznak rájuk
+        ugyelet_cellak = {}
+        for sor in sorok:
+            cellak = [sor[0]]
+            for ertek in sor[1:]:
+                if ertek is not None and ertek not in ugyelet_cellak:
+                    cella = ugyelet_cellak[ertek] = WriteOnlyCell(ws, value=ertek)
+                    cella.fill = ugyelet_kitoltes
+                    cella.alignment = kozepre
+                cellak.append(None if ertek is None else ugyelet_cellak[ertek])
+            ws.append(cellak)
+    wb.save(kimenet)
+
+
+def _csv_iras(kimenet, fejlec, sorok):
+    """Soronkénti CSV írás útvonalra, szöveges vagy bináris fájlba"""
+    if isinstance(kimenet, str):
+        with open(kimenet, 'w', newline='', encoding='utf-8') as f:
+            _csv_iras(f, fejlec, sorok)
+        return
+    szoveges = isinstance(kimenet, io.TextIOBase)
+    f = kimenet if szoveges else io.TextIOWrapper(kimenet, encoding='utf-8', newline='')
+    iro = csv.writer(f)
+    iro.writerow(fejlec)
+    iro.writerows(sorok)
+    if not szoveges:
+        # a bináris fájl nyitva marad a hívónak
+        f.flush()
+        f.detach()
+
+
+def tabla_export(kimenet, fejlec, sorok, formatum):
+    """Egyetlen tábla CSV-be (soronként) vagy Parquet-be (pyarrow szükséges)"""
+    if formatum == 'csv':
+        _csv_iras(kimenet, fejlec, sorok)
+    else:
+        pd.DataFrame(list(sorok), columns=fejlec).to_parquet(kimenet, index=False)
+
+
+def kotegelt_export(eredmenyek, kimenet, formatum=None, naptar=True):
+    """Az összes forgatókönyv és hónap egyetlen fájlba
+
+    A kimenet útvonal vagy bináris fájl. A formátum alapból a kiterjesztésből
+    jön: ".csv" és ".parquet" esetén csak a beosztás kerül a fájlba,
+    egyébként Excel munkafüzet készül (naptar=True mellett naptár lapokkal).
+    """
+    formatum = kimeneti_formatum(kimenet, formatum)
+    beosztasok = [beosztas for eredmeny in eredmenyek for beosztas in eredmeny.beosztasok.values()]
+    muszakos = any(isinstance(beosztas, MuszakBeosztas) for beosztas in beosztasok)
+    letszam = max([NAPI_LETSZAM] + [beosztas_letszam(beosztas) for beosztas in beosztasok])
+    fejlec = ['Forgatókönyv'] + beosztas_fejlec(letszam, muszakos)
+
+    def sorok():
+        for eredmeny in eredmenyek:
+            for kulcs in sorted(eredmeny.beosztasok):
+                for sor in beosztas_sorok(eredmeny.beosztasok[kulcs], letszam, muszakos):
+                    yield (eredmeny.nev,) + sor
+
+    if formatum != 'xlsx':
+        tabla_export(kimenet, fejlec, sorok(), formatum)
+        return
+
+    orvosok = {}
+    for eredmeny in eredmenyek:
+        orvosok.update(dict.fromkeys(eredmeny.ugyeletszamok))
+    statisztika = (
+        [orvos] + [eredmeny.ugyeletszamok.get(orvos) for eredmeny in eredmenyek]
+        for orvos in orvosok
+    )
+    lapok = [
+        ('Beosztás', fejlec, sorok()),
+        ('Statisztika', ['Orvos'] + [eredmeny.nev for eredmeny in eredmenyek], statisztika),
+    ]
+    figyelmeztetes_sorok = [
+        (eredmeny.nev, ev, honap, uzenet)
+        for eredmeny in eredmenyek for ev, honap, uzenet in eredmeny.figyelmeztetesek
+    ]
+    if figyelmeztetes_sorok:
+        lapok.append((
+            'Figyelmeztetések', ['Forgatókönyv', 'Év', 'Hónap', 'Figyelmeztetés'], figyelmeztetes_sorok
+        ))
+
+    naptarak = []
+    if naptar:
+        for i, eredmeny in enumerate(eredmenyek):
+            elotag = f"{i + 1}. " if len(eredmenyek) > 1 else ''
+            naptarak.extend(naptar_lapok(eredmeny.beosztasok, list(eredmeny.ugyeletszamok), elotag))
+    munkafuzet_iras(kimenet, lapok, naptarak)
@@ -0,0 +1,399 @@
+"""Az ügyeleti beosztás generátora"""
+import calendar
+import hashlib
+import threading
+from collections import OrderedDict, namedtuple
+from datetime import date, datetime
+
+import numpy as np
+
+from . import kivetel_elemzo, optimalis_beosztas
+from .muszakok import MuszakBeosztas
+from .diagnosztika import NaploDiagnosztika
+from .keresek import KeresTar
+from .korlatozasok import KorlatozasTar
+from .meres import KIKAPCSOLT
+
+# Ezekkel a státuszokkal az orvos nem osztható be az adott napra
+TILTO_STATUSZOK = ("Szabadság", "Ne ügyeljen")
+
+# az orvosok neve beolvasási sorrendben és a nem módosítható KeresTar
+BeolvasottKeresek = namedtuple('BeolvasottKeresek', ['orvos_nevek', 'keresek'])
+
+
+class MunkafuzetCache:
+    """Beolvasott munkafüzetek LRU gyorsítótára a fájl tartalmának hash-e szerint
+    
+    Streamlit nélkül is használható; a Streamlit oldal egy példányt oszt meg
+    a munkamenetek között, ezért a hozzáférés zárral védett.
+    """
+    def __init__(self, max_meret=8):
+        self.max_meret = max_meret
+        self._elemek = OrderedDict()  # {sha256: BeolvasottKeresek}
+        self._zar = threading.Lock()
+
+    @staticmethod
+    def kulcs(file_content):
+        return hashlib.sha256(file_content).hexdigest()
+
+    def __len__(self):
+        return len(self._elemek)
+
+    def __contains__(self, file_content):
+        return self.kulcs(file_content) in self._elemek
+
+    def beolvasas(self, file_content, streaming=False, diagnosztika=None, meres=None):
+        """A munkafüzet pillanatképe; csak akkor olvassa be, ha még nincs a tárban
+        
+        Sikertelen beolvasáskor None, a hiba a diagnosztika kimenetre kerül.
+        """
+        meres = meres or KIKAPCSOLT
+        kulcs = self.kulcs(file_content)
+        with self._zar:
+            if kulcs in self._elemek:
+                meres.szamlalo('munkafuzet_cache_talalatok')
+                self._elemek.move_to_end(kulcs)
+                return self._elemek[kulcs]
+        
+        meres.szamlalo('munkafuzet_cache_hianyok')
+        generator = UgyeletiBeosztasGenerator(diagnosztika, meres)
+        if not generator.excel_beolvasas(file_content, streaming=streaming):
+            return None
+        pillanatkep = generator.pillanatkep()
+        
+        with self._zar:
+            self._elemek[kulcs] = pillanatkep
+            self._elemek.move_to_end(kulcs)
+            while len(self._elemek) > self.max_meret:
+                self._elemek.popitem(last=False)
+        return pillanatkep
+
+    def torles(self):
+        with self._zar:
+            self._elemek.clear()
+
+
+class UgyeletiBeosztasGenerator:
+    def __init__(self, diagnosztika=None, meres=None, haladas=None):
+        # Hibák és figyelmeztetések kimenete (alapból a logging modul)
+        self.diagnosztika = diagnosztika or NaploDiagnosztika()
+        # Szakaszidők és számlálók (alapból kikapcsolva, lásd meres.py)
+        self.meres = meres or KIKAPCSOLT
+        # Opcionális (szakasz, lépés, összes) függvény a haladás jelzésére (lásd hatter.py)
+        self.haladas = haladas
+        self.orvosok = {}
+        self.keresek = KeresTar()  # kódolt kérések hónaponkénti orvos x nap mátrixokban
+        self.korlatozasok = KorlatozasTar()  # dátum kivételek és párosítási tiltások
+        self.weekday_exceptions = {}   # {orvos: [engedélyezett hét napok (0-6)]}
+        self._hetnap_szabalyok = {}  # {orvos: [HetnapKivetel]} felvételi sorrendben, a törléshez
+        self._elerhetoseg = {}  # {(év, hónap): bool mátrix [orvos, nap]}
+        self._orvos_index = {}  # {orvos: sor index a mátrixban}
+        
+    @property
+    def felhasznaloi_kivetelek(self):
+        """[(orvos, kezdet, vég, indok)] – a tartományok nincsenek napokra bontva"""
+        return self.korlatozasok.idoszakok()
+
+    @property
+    def pairing_constraints(self):
+        """[(orvos1, orvos2)]"""
+        return self.korlatozasok.parok()
+
+    @classmethod
+    def pillanatkepbol(cls, pillanatkep, diagnosztika=None, meres=None, haladas=None):
+        """Új generátor egy beolvasott munkafüzetből, nullázott ügyeletszámokkal"""
+        generator = cls(diagnosztika, meres, haladas)
+        generator.orvosok = {
+            nev: {'nev': nev, 'ugyeletek_szama': 0} for nev in pillanatkep.orvos_nevek
+        }
+        generator.keresek = pillanatkep.keresek.masolat()
+        generator._elerhetoseg_torles()
+        return generator
+
+    def elozmenyek_beallitas(self, szamok):
+        """A korábbi ügyeletszámok beállítása kiinduló terhelésként (pl. a nyilvántartásból)
+        
+        szamok: {orvos: ügyeletek száma}; a hiányzó orvosok nulláról indulnak.
+        """
+        for orvos, adatok in self.orvosok.items():
+            adatok['ugyeletek_szama'] = szamok.get(orvos, 0)
+
+    def pillanatkep(self):
+        """A beolvasott kérések megváltoztathatatlan pillanatképe"""
+        return BeolvasottKeresek(tuple(self.orvosok), self.keresek.masolat(fagyasztott=True))
+
+    def excel_beolvasas(self, file_content, streaming=False):
+        """Excel tartalom feldolgozása memóriából
+        
+        Minden munkalapot pontosan egyszer olvasunk be, majd egy hosszú
+        (év, hónap, orvos, nap, státusz) táblából töltjük fel a kérés tárat.
+        Nagyon nagy fájloknál a streaming=True csak olvasható openpyxl módot használ.
+        """
+        # A pandas betöltése lassú, ezért csak az első beolvasáskor importáljuk
+        from . import beolvasas
+        
+        try:
+            with self.meres.szakasz('excel_beolvasas'):
+                orvos_nevek, tabla = beolvasas.munkafuzet_beolvasas(file_content, streaming)
+                for orvos_nev in orvos_nevek:
+                    if orvos_nev not in self.orvosok:
+                        self.orvosok[orvos_nev] = {
+                            'nev': orvos_nev,
+                            'ugyeletek_szama': 0
+                        }
+                    self.keresek.orvos_kod(orvos_nev)
+                self.keresek.tabla_betoltes(tabla)
+                self._elerhetoseg_torles()
+            self.meres.szamlalo('beolvasott_keresek', len(tabla))
+            return True
+            
+        except Exception as e:
+            self.diagnosztika.hiba(f"Hiba az Excel beolvasása során: {str(e)}")
+            return False
+
+    def kivetel_hozzaadas(self, szoveg):
+        """Kivételek feldolgozása a felhasználói szövegből
+        
+        Visszaadja a fel nem dolgozható sorok diagnosztikáit.
+        """
+        if not szoveg:
+            return []
+            
+        # Töröljük a meglévő kivételeket az új feldolgozás előtt
+        self.korlatozasok.torles()
+        self.weekday_exceptions = {}
+        self._hetnap_szabalyok = {}
+        self._elerhetoseg_torles()
+        
+        with self.meres.szakasz('kivetel_elemzes'):
+            eredmeny = kivetel_elemzo.elemzes(szoveg)
+            for szabaly in eredmeny.szabalyok:
+                self.szabaly_hozzaadas(szabaly)
+        self.meres.szamlalo('kivetel_szabalyok', len(eredmeny.szabalyok))
+        return eredmeny.diagnosztikak
+
+    def szabaly_hozzaadas(self, szabaly):
+        """Egy elemzett kivétel szabály felvétele, a kiszámolt mátrixok frissítésével"""
+        if isinstance(szabaly, kivetel_elemzo.ParTiltas):
+            self.korlatozasok.par_tiltas(szabaly.orvos1, szabaly.orvos2)
+        elif isinstance(szabaly, kivetel_elemzo.HetnapKivetel):
+            self._hetnap_szabalyok.setdefault(szabaly.orvos, []).append(szabaly)
+            self.weekday_exceptions[szabaly.orvos] = list(szabaly.hetnapok)
+            self._orvos_sor_frissites(szabaly.orvos)
+        else:
+            self.korlatozasok.idoszak_hozzaadas(
+                szabaly.orvos, szabaly.kezdet, szabaly.veg, szabaly.indok
+            )
+            self._elerhetoseg_kizaras(szabaly.orvos, szabaly.kezdet, szabaly.veg)
+
+    def szabaly_torles(self, szabaly):
+        """Egy korábban felvett kivétel szabály visszavonása, a kiszámolt mátrixok frissítésével"""
+        if isinstance(szabaly, kivetel_elemzo.ParTiltas):
+            self.korlatozasok.par_torles(szabaly.orvos1, szabaly.orvos2)
+        elif isinstance(szabaly, kivetel_elemzo.HetnapKivetel):
+            szabalyok = self._hetnap_szabalyok.get(szabaly.orvos, [])
+            if szabaly in szabalyok:
+                szabalyok.remove(szabaly)
+                # Teljes feldolgozáskor az orvos utolsó hétnap szabálya érvényes
+                if szabalyok:
+                    self.weekday_exceptions[szabaly.orvos] = list(szabalyok[-1].hetnapok)
+                else:
+                    del self._hetnap_szabalyok[szabaly.orvos]
+                    del self.weekday_exceptions[szabaly.orvos]
+                self._orvos_sor_frissites(szabaly.orvos)
+        elif self.korlatozasok.idoszak_torles(
+            szabaly.orvos, szabaly.kezdet, szabaly.veg, szabaly.indok
+        ):
+            self._orvos_sor_frissites(szabaly.orvos)
+    
+    def haladas_jelzes(self, szakasz, lepes, osszes):
+        """A haladás továbbítása a haladas függvénynek, ha van (az megszakíthatja a munkát)"""
+        if self.haladas is not None:
+            self.haladas(szakasz, lepes, osszes)
+
+    def _elerhetoseg_torles(self):
+        """Az előre kiszámolt elérhetőségi mátrixok érvénytelenítése"""
+        self._elerhetoseg = {}
+        self._orvos_index = {orvos: i for i, orvos in enumerate(self.orvosok)}
+
+    def _orvos_sor(self, orvos, ev, honap):
+        """Egy orvos elérhetőségi sora az adott hónapra (napok szerint)"""
+        napok_szama = calendar.monthrange(ev, honap)[1]
+        
+        # Az Excelben megadott tiltó kérések
+        sor = ~self.keresek.statusz_maszk(ev, honap, TILTO_STATUSZOK, orvos)[:napok_szama]
+        
+        # Hétnapi kivétel: csak az engedélyezett napokon lehet elérhető
+        if orvos in self.weekday_exceptions:
+            elso_hetnap = calendar.monthrange(ev, honap)[0]
+            hetnapok = (np.arange(napok_szama) + elso_hetnap) % 7
+            sor &= np.isin(hetnapok, self.weekday_exceptions[orvos])
+        
+        # Dátumra vonatkozó felhasználói kivételek
+        for elso_nap, utolso_nap in self.korlatozasok.honap_tiltasai(orvos, ev, honap):
+            sor[elso_nap - 1:utolso_nap] = False
+        return sor
+
+    def elerhetosegi_matrix(self, ev, honap):
+        """Orvos x nap logikai mátrix az adott hónapra, egyszer számolva"""
+        kulcs = (ev, honap)
+        if kulcs in self._elerhetoseg:
+            return self._elerhetoseg[kulcs]
+        with self.meres.szakasz('elerhetoseg'):
+            matrix = self._matrix_szamitas(ev, honap)
+        self._elerhetoseg[kulcs] = matrix
+        return matrix
+
+    def _matrix_szamitas(self, ev, honap):
+        """Az elérhetőségi mátrix kiszámítása a kérésekből és a kivételekből"""
+        if len(self._orvos_index) != len(self.orvosok):
+            self._elerhetoseg_torles()
+        
+        napok_szama = calendar.monthrange(ev, honap)[1]
+        matrix = np.ones((len(self._orvos_index), napok_szama), dtype=bool)
+        
+        # Az Excelben megadott tiltó kérések (a tár sorai a tár orvos kódjai szerint)
+        tiltott = self.keresek.statusz_maszk(ev, honap, TILTO_STATUSZOK)[:, :napok_szama]
+        sorok = np.array([self._orvos_index.get(orvos, -1) for orvos in self.keresek.orvosok], dtype=np.int64)
+        ismert = sorok >= 0
+        matrix[sorok[ismert]] &= ~tiltott[ismert]
+        
+        # Hétnapi kivételek
+        elso_hetnap = calendar.monthrange(ev, honap)[0]
+        hetnapok = (np.arange(napok_szama) + elso_hetnap) % 7
+        for orvos, allowed in self.weekday_exceptions.items():
+            i = self._orvos_index.get(orvos)
+            if i is not None:
+                matrix[i] &= np.isin(hetnapok, allowed)
+        
+        # Dátumra vonatkozó felhasználói kivételek
+        for orvos in self.korlatozasok.orvosok():
+            i = self._orvos_index.get(orvos)
+            if i is None:
+                continue
+            for elso_nap, utolso_nap in self.korlatozasok.honap_tiltasai(orvos, ev, honap):
+                matrix[i, elso_nap - 1:utolso_nap] = False
+        return matrix
+
+    def _elerhetoseg_kizaras(self, orvos, kezdet, veg):
+        """Egy új kivételes időszak beírása a már kiszámolt mátrixokba"""
+        i = self._orvos_index.get(orvos)
+        if i is None:
+            return
+        for (ev, honap), matrix in self._elerhetoseg.items():
+            ho_eleje = date(ev, honap, 1)
+            ho_vege = date(ev, honap, matrix.shape[1])
+            if kezdet <= ho_vege and veg >= ho_eleje:
+                matrix[i, max(kezdet, ho_eleje).day - 1:min(veg, ho_vege).day] = False
+
+    def _orvos_sor_frissites(self, orvos):
+        """Egy orvos sorának újraszámolása a már kiszámolt mátrixokban"""
+        i = self._orvos_index.get(orvos)
+        if i is None:
+            return
+        for (ev, honap), matrix in self._elerhetoseg.items():
+            matrix[i] = self._orvos_sor(orvos, ev, honap)
+
+    def elerheto_orvosok(self, datum):
+        """Visszaadja az adott napon elérhető orvosokat"""
+        self.meres.szamlalo('elerhetosegi_lekerdezesek')
+        matrix = self.elerhetosegi_matrix(datum.year, datum.month)
+        orvos_lista = list(self._orvos_index)
+        return [orvos_lista[i] for i in np.flatnonzero(matrix[:, datum.day - 1])]
+
+    def can_pair(self, doc1, doc2):
+        """Ellenőrzi, hogy két orvos párosítható-e egymással"""
+        self.meres.szamlalo('parositasi_ellenorzesek')
+        return self.korlatozasok.parosithato(doc1, doc2)
+    
+    def napi_elerhetoseg(self, ev, honap):
+        """Az adott hónap napjai (dátum szöveg) és az aznap elérhető orvosok listája"""
+        napok_szama = calendar.monthrange(ev, honap)[1]
+        matrix = self.elerhetosegi_matrix(ev, honap)
+        self.meres.szamlalo('elerhetosegi_lekerdezesek', napok_szama)
+        orvos_lista = list(self._orvos_index)
+        return [
+            (
+                datetime(ev, honap, nap).strftime('%Y-%m-%d'),
+                [orvos_lista[i] for i in np.flatnonzero(matrix[:, nap - 1])]
+            )
+            for nap in range(1, napok_szama + 1)
+        ]
+
+    def moho_beosztas(self, ev, honap, szamok, veletlen=None):
+        """Mohó napi kiválasztás a legkevesebb ügyeletet teljesítő orvosokkal
+        
+        A szamok ({orvos: ügyeletek száma}) szótárat helyben frissíti, a
+        generátor állapotát nem módosítja. Visszaadja a beosztást és a
+        figyelmeztetéseket. Azonos ügyeletszámnál alapból a beolvasási sorrend
+        dönt; veletlen (numpy Generator) megadásakor naponta véletlen sorrend.
+        """
+        beosztas = {}
+        figyelmeztetesek = []
+        ellenorzesek = 0  # párosítási ellenőrzések, a végén egyszer jelentve
+        
+        napok = self.napi_elerhetoseg(ev, honap)
+        for nap, (datum_str, elerheto_orvosok) in enumerate(napok, 1):
+            self.haladas_jelzes('beosztas', nap, len(napok))
+            if len(elerheto_orvosok) < 2:
+                figyelmeztetesek.append(f"Nem található elegendő elérhető orvos: {datum_str} (minimum 2 szükséges)")
+                beosztas[datum_str] = []
+                continue
+            if veletlen is not None:
+                elerheto_orvosok = [elerheto_orvosok[i] for i in veletlen.permutation(len(elerheto_orvosok))]
+            
+            # Első orvos kiválasztása
+            first = min(elerheto_orvosok, key=szamok.__getitem__)
+            
+            # Második orvos kiválasztása, a párosítási korlátozást figyelembe véve
+            tiltott = self.korlatozasok.tiltott_partnerek(first)
+            ellenorzesek += len(elerheto_orvosok) - 1
+            remaining = [doc for doc in elerheto_orvosok if doc != first and doc not in tiltott]
+            if not remaining:
+                figyelmeztetesek.append(f"Nincs megfelelő második orvos a {datum_str} napon {first} esetében a párosítási kivétel miatt")
+                beosztas[datum_str] = [first]
+                szamok[first] += 1
+                continue
+            
+            second = min(remaining, key=szamok.__getitem__)
+            
+            beosztas[datum_str] = [first, second]
+            szamok[first] += 1
+            szamok[second] += 1
+        
+        self.meres.szamlalo('parositasi_ellenorzesek', ellenorzesek)
+        return beosztas, figyelmeztetesek
+
+    def beosztas_keszites(self, ev, honap, megoldo='moho', **beallitasok):
+        """Havi beosztás két orvossal naponta, felületi mellékhatások nélkül
+        
+        A megoldo a MEGOLDOK egyik neve ('moho', 'cpsat') vagy egy
+        (generator, ev, honap, **beallitasok) -> (beosztas, figyelmeztetesek)
+        függvény. Több műszakhoz és osztályhoz a muszakok.megoldo(beallitas)
+        adható meg, ekkor a beosztás MuszakBeosztas ({műszak: beosztás}).
+        A beosztott ügyeleteket hozzáadja az ügyeletszámokhoz, így
+        az egymás utáni hónapok a korábbi terhelést is figyelembe veszik.
+        Visszaadja a beosztást és a figyelmeztetéseket.
+        """
+        if not callable(megoldo):
+            megoldo = optimalis_beosztas.MEGOLDOK[megoldo]
+        with self.meres.szakasz('beosztas'):
+            beosztas, figyelmeztetesek = megoldo(self, ev, honap, **beallitasok)
+        if isinstance(beosztas, MuszakBeosztas):
+            napi_beosztasok = [napi for muszak in beosztas.values() for napi in muszak.values()]
+        else:
+            napi_beosztasok = list(beosztas.values())
+        self.meres.szamlalo('beosztott_napok', sum(1 for orvosok in napi_beosztasok if orvosok))
+        self.meres.szamlalo('figyelmeztetesek', len(figyelmeztetesek))
+        
+        for orvosok in napi_beosztasok:
+            for orvos in orvosok:
+                self.orvosok[orvos]['ugyeletek_szama'] += 1
+        return beosztas, figyelmeztetesek
+
+    def beosztas_generalas(self, ev, honap, megoldo='moho', **beallitasok):
+        """Havi beosztás generálása (alapból két orvossal naponta), a figyelmeztetések megjelenítésével"""
+        beosztas, figyelmeztetesek = self.beosztas_keszites(ev, honap, megoldo, **beallitasok)
+        for figyelmeztetes in figyelmeztetesek:
+            self.diagnosztika.figyelmeztetes(figyelmeztetes)
+        return beosztas
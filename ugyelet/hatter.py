@@ -0,0 +1,122 @@
+"""Háttérben futó feladatok haladásjelzéssel és megszakítással
+
+A generálás (beolvasás, beosztás, export) egy közös szálkészletben fut, így
+a hívó (pl. a Streamlit szkript szála) azonnal visszatér, és az oldal
+újrafuttatása nem szakítja félbe a munkát. Egy munkamenet feladatai nem
+tartják fel a többit: a készlet több feladatot futtat egyszerre, a többi
+sorban áll. Folyamatok helyett szálak futnak, mert a beolvasott munkafüzetek
+gyorsítótára és a javítandó generátor a hívóval közös; a nehéz részek (a
+CP-SAT keresés és a többszöri indítás folyamatai) közben a GIL szabad.
+
+A munka első argumentuma maga a Feladat: a feladat.haladas(szakasz, lepes,
+osszes) hívás frissíti a megjelenített állapotot, és Megszakitva kivételt
+dob, ha a megszakítást kérték. A generátor haladas függvényeként megadva
+a beosztás napjai is jelzik a haladást:
+
+    futtato = FeladatFuttato()
+    feladat = futtato.inditas(munka, ...)
+    ...
+    feladat.allapot_kep()  # (állapot, szakasz, lépés, összes)
+    feladat.megszakitas()
+"""
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+VARAKOZIK = 'varakozik'
+FUT = 'fut'
+KESZ = 'kesz'
+HIBA = 'hiba'
+MEGSZAKITVA = 'megszakitva'
+BEFEJEZETT = (KESZ, HIBA, MEGSZAKITVA)
+
+
+class Megszakitva(Exception):
+    """A feladat megszakítását kérték"""
+
+
+class Feladat:
+    """Egy háttérfeladat állapota, haladása és eredménye
+
+    Az állapotot a munka szála írja, a hívó szál csak olvassa
+    (allapot_kep), a megszakítás kérése pedig egy esemény beállítása.
+    """
+    def __init__(self, azonosito, nev=''):
+        self.azonosito = azonosito
+        self.nev = nev
+        self.allapot = VARAKOZIK
+        self.szakasz = None
+        self.lepes = 0
+        self.osszes = 0
+        self.eredmeny = None
+        self.hiba = None
+        self.kezdet = time.time()
+        self.veg = None
+        self._megszakitas = threading.Event()
+        self._zar = threading.Lock()
+        self._jovo = None
+
+    @property
+    def befejezodott(self):
+        return self.allapot in BEFEJEZETT
+
+    @property
+    def megszakitas_kerve(self):
+        return self._megszakitas.is_set()
+
+    def haladas(self, szakasz, lepes=0, osszes=0):
+        """A haladás rögzítése; Megszakitva kivétel, ha a megszakítást kérték"""
+        if self._megszakitas.is_set():
+            raise Megszakitva()
+        with self._zar:
+            self.szakasz, self.lepes, self.osszes = szakasz, lepes, osszes
+
+    def allapot_kep(self):
+        """(állapot, szakasz, lépés, összes) egyetlen konzisztens pillanatban"""
+        with self._zar:
+            return self.allapot, self.szakasz, self.lepes, self.osszes
+
+    def megszakitas(self):
+        """A megszakítás kérése; a még el nem indult feladat azonnal megszakad"""
+        self._megszakitas.set()
+        if self._jovo is not None and self._jovo.cancel():
+            self._befejezes(MEGSZAKITVA)
+
+    def _befejezes(self, allapot, eredmeny=None, hiba=None):
+        with self._zar:
+            self.allapot = allapot
+            self.eredmeny = eredmeny
+            self.hiba = hiba
+            self.veg = time.time()
+
+    def _futtatas(self, munka, args, kwargs):
+        if self._megszakitas.is_set():
+            self._befejezes(MEGSZAKITVA)
+            return
+        with self._zar:
+            self.allapot = FUT
+        try:
+            eredmeny = munka(self, *args, **kwargs)
+        except Megszakitva:
+            self._befejezes(MEGSZAKITVA)
+        except Exception as e:
+            self._befejezes(HIBA, hiba=e)
+        else:
+            self._befejezes(KESZ, eredmeny)
+
+
+class FeladatFuttato:
+    """Közös szálkészlet a háttérfeladatokhoz
+
+    max_munkasok: az egyszerre futó feladatok száma, a többi sorban áll
+    """
+    def __init__(self, max_munkasok=4):
+        self._executor = ThreadPoolExecutor(max_workers=max_munkasok, thread_name_prefix='ugyelet-feladat')
+        self._azonositok = itertools.count(1)
+
+    def inditas(self, munka, *args, nev='', **kwargs):
+        """A munka(feladat, *args, **kwargs) indítása a háttérben; visszaadja a Feladat-ot"""
+        feladat = Feladat(next(self._azonositok), nev)
+        feladat._jovo = self._executor.submit(feladat._futtatas, munka, args, kwargs)
+        return feladat
@@ -0,0 +1,129 @@
+"""Meglévő beosztás javítása kivétel változás után
+
+Egy új vagy törölt kivétel (pl. "Dr. Kiss 2024.01.15 szabadság") miatt nem
+generáljuk újra a teljes hónapot. Csak azokat a napokat nyitjuk újra, amelyek
+az új szabályokkal érvénytelenek: a beosztott orvos már nem elérhető, vagy
+tiltott pár dolgozik együtt. Törlés után a kettőnél kevesebb orvossal
+maradt napokat is. Az érvényes beosztásokat ezeken a napokon is megtartjuk,
+és csak a megüresedett helyeket töltjük fel a legkevesebb ügyeletet
+teljesítő elérhető orvossal. A beosztás többi része változatlan marad, az
+eredmény pedig a ténylegesen megváltozott napok listája.
+"""
+from collections import Counter, namedtuple
+from datetime import date, timedelta
+
+from . import kivetel_elemzo
+from .optimalis_beosztas import NAPI_LETSZAM
+
+# Egy megváltozott nap: dátum szöveg, a régi és az új orvosok
+NapValtozas = namedtuple('NapValtozas', ['datum', 'regi', 'uj'])
+JavitasEredmeny = namedtuple('JavitasEredmeny', ['beosztas', 'valtozasok', 'figyelmeztetesek'])
+
+
+def szoveg_valtozas(regi_szoveg, uj_szoveg):
+    """A két kivétel szöveg közötti különbség (hozzáadott, törölt) szabályokként
+
+    A sorok elemzése gyorsítótárazott, így ez a változatlan soroknál nem
+    jelent újabb munkát.
+    """
+    regi = Counter(kivetel_elemzo.elemzes(regi_szoveg).szabalyok)
+    uj = Counter(kivetel_elemzo.elemzes(uj_szoveg).szabalyok)
+    return list((uj - regi).elements()), list((regi - uj).elements())
+
+
+def _napok(datum, szomszedsag):
+    return [
+        (datum + timedelta(days=eltolas)).strftime('%Y-%m-%d')
+        for eltolas in range(-szomszedsag, szomszedsag + 1)
+    ]
+
+
+def beosztas_javitas(generator, beosztas, hozzaadott=(), torolt=(), szomszedsag=0):
+    """A beosztás javítása a hozzáadott és törölt szabályok után
+
+    generator: az a generátor, amellyel a beosztás készült (az ügyeletszámai
+        tartalmazzák a beosztást); a szabályokat és az ügyeletszámokat helyben
+        frissítjük
+    beosztas: {dátum szöveg: [orvosok]}, nem módosul
+    hozzaadott, torolt: kivetel_elemzo szabályok (DatumKivetel, HetnapKivetel, ParTiltas)
+    szomszedsag: ennyi szomszédos napot is újranyitunk az érintett napok körül
+        a kiegyensúlyozottabb újraosztáshoz (0 = a lehető legkisebb változás)
+    """
+    with generator.meres.szakasz('javitas'):
+        eredmeny = _javitas(generator, beosztas, hozzaadott, torolt, szomszedsag)
+    generator.meres.szamlalo('javitott_napok', len(eredmeny.valtozasok))
+    generator.meres.szamlalo('figyelmeztetesek', len(eredmeny.figyelmeztetesek))
+    return eredmeny
+
+
+def _javitas(generator, beosztas, hozzaadott, torolt, szomszedsag):
+    for szabaly in torolt:
+        generator.szabaly_torles(szabaly)
+    for szabaly in hozzaadott:
+        generator.szabaly_hozzaadas(szabaly)
+
+    # Érintett napok: ahol a jelenlegi beosztás az új szabályokkal érvénytelen
+    elerheto = {}
+    erintett = set()
+    for datum_str, orvosok in beosztas.items():
+        datum = date.fromisoformat(datum_str)
+        matrix = generator.elerhetosegi_matrix(datum.year, datum.month)
+        elerheto[datum_str] = oszlop = matrix[:, datum.day - 1]
+        ervenytelen = any(
+            orvos not in generator._orvos_index or not oszlop[generator._orvos_index[orvos]]
+            for orvos in orvosok
+        ) or any(
+            not generator.korlatozasok.parosithato(egyik, masik)
+            for i, egyik in enumerate(orvosok) for masik in orvosok[i + 1:]
+        )
+        if ervenytelen or (torolt and len(orvosok) < NAPI_LETSZAM):
+            erintett.update(_napok(datum, szomszedsag))
+    erintett &= beosztas.keys()
+
+    orvos_lista = list(generator._orvos_index)
+    szamok = {orvos: adatok['ugyeletek_szama'] for orvos, adatok in generator.orvosok.items()}
+    uj_beosztas = dict(beosztas)
+    valtozasok = []
+    figyelmeztetesek = []
+
+    for lepes, datum_str in enumerate(sorted(erintett), 1):
+        generator.haladas_jelzes('javitas', lepes, len(erintett))
+        regi = beosztas[datum_str]
+        oszlop = elerheto[datum_str]
+        for orvos in regi:
+            szamok[orvos] -= 1
+
+        # A még érvényes beosztottakat megtartjuk; szomszédság esetén az
+        # újranyitott napokat teljesen újraosztjuk
+        napi = []
+        if szomszedsag == 0:
+            for orvos in regi:
+                i = generator._orvos_index.get(orvos)
+                if i is not None and oszlop[i] and all(
+                    generator.korlatozasok.parosithato(orvos, tars) for tars in napi
+                ):
+                    napi.append(orvos)
+
+        jeloltek = [orvos_lista[i] for i in oszlop.nonzero()[0]]
+        while len(napi) < NAPI_LETSZAM:
+            lehetseges = [
+                orvos for orvos in jeloltek
+                if orvos not in napi
+                and all(generator.korlatozasok.parosithato(orvos, tars) for tars in napi)
+            ]
+            if not lehetseges:
+                figyelmeztetesek.append(
+                    f"Nem sikerült {NAPI_LETSZAM} orvost beosztani a {datum_str} napon a módosítás után"
+                )
+                break
+            napi.append(min(lehetseges, key=szamok.__getitem__))
+
+        for orvos in napi:
+            szamok[orvos] += 1
+        uj_beosztas[datum_str] = napi
+        if set(napi) != set(regi):
+            valtozasok.append(NapValtozas(datum_str, list(regi), napi))
+
+    for orvos, szam in szamok.items():
+        generator.orvosok[orvos]['ugyeletek_szama'] = szam
+    return JavitasEredmeny(uj_beosztas, valtozasok, figyelmeztetesek)
@@ -0,0 +1,231 @@
+"""Az ügyeleti kérések tömör, oszlopos tára
+
+Az orvosokat és a státuszokat kis egész kódokká alakítjuk (a 0 státuszkód
+jelenti, hogy nincs kérés), a kéréseket pedig hónaponként egy sűrű
+orvos x 31 nap int8 mátrixban tároljuk. Egy nap vagy egy orvos kérései így
+egy oszlop vagy egy sor, a tiltó státuszok maszkja egyetlen numpy művelet.
+
+A tár .npz fájlba menthető; tömörítetlen mentésből betöltéskor a kérés
+mátrixok memóriába képezhetők (mmap=True), ilyenkor csak olvashatók, az
+első módosításkor a módosított hónapról másolat készül.
+"""
+import struct
+import zipfile
+
+import numpy as np
+
+NAPOK = 31
+
+
+def _npz_memmap(utvonal, nev):
+    """Egy tömörítetlen .npz tag memóriába képezése másolás nélkül"""
+    with zipfile.ZipFile(utvonal) as zf:
+        info = zf.getinfo(nev + '.npy')
+    if info.compress_type != zipfile.ZIP_STORED:
+        raise ValueError(f"A(z) {nev} tömb tömörítve van, nem képezhető memóriába")
+    with open(utvonal, 'rb') as f:
+        # a helyi zip fejléc 30 bájt, utána a név és az extra mező
+        f.seek(info.header_offset + 26)
+        nev_hossz, extra_hossz = struct.unpack('<HH', f.read(4))
+        f.seek(info.header_offset + 30 + nev_hossz + extra_hossz)
+        verzio = np.lib.format.read_magic(f)
+        if verzio == (1, 0):
+            alak, fortran, tipus = np.lib.format.read_array_header_1_0(f)
+        else:
+            alak, fortran, tipus = np.lib.format.read_array_header_2_0(f)
+        eltolas = f.tell()
+    return np.memmap(utvonal, dtype=tipus, mode='r', offset=eltolas, shape=alak,
+                     order='F' if fortran else 'C')
+
+
+class KeresTar:
+    """Kódolt kérések hónaponkénti orvos x nap mátrixokban
+
+    orvosok: az ismert orvosok kezdeti sorrendje (ez lesz a kódjuk)
+    """
+    def __init__(self, orvosok=()):
+        self.orvosok = []  # kód -> név
+        self._orvos_kod = {}
+        self.statuszok = [None]  # kód -> státusz, a 0 az üres cella
+        self._statusz_kod = {}
+        self._tipus = np.int8
+        self._matrixok = {}  # {(év, hónap): int mátrix [orvos kód, nap - 1]}
+        self._fagyasztott = False
+        for orvos in orvosok:
+            self.orvos_kod(orvos)
+
+    def __len__(self):
+        """A nem üres kérés cellák száma"""
+        return sum(int(np.count_nonzero(matrix)) for matrix in self._matrixok.values())
+
+    def __eq__(self, masik):
+        return isinstance(masik, KeresTar) and self.szotar() == masik.szotar()
+
+    def orvos_kod(self, orvos):
+        kod = self._orvos_kod.get(orvos)
+        if kod is None:
+            kod = self._orvos_kod[orvos] = len(self.orvosok)
+            self.orvosok.append(orvos)
+        return kod
+
+    def statusz_kod(self, statusz):
+        kod = self._statusz_kod.get(statusz)
+        if kod is None:
+            kod = self._statusz_kod[statusz] = len(self.statuszok)
+            self.statuszok.append(statusz)
+            if kod > np.iinfo(self._tipus).max:
+                # sok különböző szabad szöveges cella: szélesebb kódok
+                self._tipus = np.int16
+                self._matrixok = {
+                    kulcs: matrix.astype(np.int16) for kulcs, matrix in self._matrixok.items()
+                }
+        return kod
+
+    def _irhato_matrix(self, ev, honap):
+        """A hónap mátrixa írásra, az orvosok számához igazítva (szükség esetén másolat)"""
+        matrix = self._matrixok.get((ev, honap))
+        if matrix is None:
+            matrix = np.zeros((len(self.orvosok), NAPOK), dtype=self._tipus)
+        elif matrix.shape[0] < len(self.orvosok):
+            matrix = np.vstack([
+                matrix, np.zeros((len(self.orvosok) - matrix.shape[0], NAPOK), dtype=self._tipus)
+            ])
+        elif not matrix.flags.writeable:
+            matrix = np.array(matrix)
+        self._matrixok[ev, honap] = matrix
+        return matrix
+
+    def _modosithato(self):
+        if self._fagyasztott:
+            raise TypeError("A pillanatkép kérései nem módosíthatók")
+
+    def hozzaadas(self, ev, honap, orvos, nap, statusz):
+        """Egy kérés felvétele (a későbbi felülírja a korábbit)"""
+        self._modosithato()
+        orvos_kod = self.orvos_kod(orvos)
+        statusz_kod = self.statusz_kod(statusz)
+        self._irhato_matrix(ev, honap)[orvos_kod, nap - 1] = statusz_kod
+
+    def tabla_betoltes(self, tabla):
+        """A hosszú (év, hónap, orvos, nap, státusz) tábla betöltése hónaponként egy lépésben"""
+        self._modosithato()
+        if not len(tabla):
+            return
+        # egyedi értékenként egy kódolás, majd kódtábla indexelés soronként
+        orvos_index, orvos_ertekek = tabla['orvos'].factorize()
+        orvos_kodok = np.array([self.orvos_kod(o) for o in orvos_ertekek], dtype=np.int64)[orvos_index]
+        statusz_index, statusz_ertekek = tabla['status'].factorize()
+        statusz_kodok = np.array([self.statusz_kod(s) for s in statusz_ertekek], dtype=np.int64)[statusz_index]
+        napok = tabla['nap'].to_numpy(dtype=np.int64) - 1
+        honap_kulcsok = tabla['ev'].to_numpy(dtype=np.int64) * 100 + tabla['honap'].to_numpy(dtype=np.int64)
+        kulcsok, csoportok = np.unique(honap_kulcsok, return_inverse=True)
+        for i, kulcs in enumerate(kulcsok.tolist()):
+            maszk = csoportok == i
+            matrix = self._irhato_matrix(kulcs // 100, kulcs % 100)
+            matrix[orvos_kodok[maszk], napok[maszk]] = statusz_kodok[maszk]
+
+    def honapok(self):
+        """A kérést tartalmazó (év, hónap) párok időrendben"""
+        return sorted(self._matrixok)
+
+    def honap_matrix(self, ev, honap):
+        """Státuszkódok orvos x 31 nap mátrixban (csak olvasásra), vagy None"""
+        matrix = self._matrixok.get((ev, honap))
+        if matrix is not None and matrix.shape[0] < len(self.orvosok):
+            matrix = self._irhato_matrix(ev, honap)
+        return matrix
+
+    def statusz_maszk(self, ev, honap, statuszok, orvos=None):
+        """Logikai orvos x 31 nap mátrix: hol van a megadott státuszok valamelyike
+
+        Ha az orvos meg van adva, csak az ő 31 napos sora.
+        """
+        matrix = self.honap_matrix(ev, honap)
+        if orvos is not None:
+            kod = self._orvos_kod.get(orvos)
+            if matrix is None or kod is None:
+                return np.zeros(NAPOK, dtype=bool)
+            matrix = matrix[kod]
+        elif matrix is None:
+            return np.zeros((len(self.orvosok), NAPOK), dtype=bool)
+        kodok = [self._statusz_kod[s] for s in statuszok if s in self._statusz_kod]
+        return np.isin(matrix, kodok)
+
+    def orvos_keresei(self, ev, honap, orvos):
+        """Egy orvos kérései a hónapban: {nap: státusz}"""
+        matrix = self._matrixok.get((ev, honap))
+        kod = self._orvos_kod.get(orvos)
+        if matrix is None or kod is None or kod >= matrix.shape[0]:
+            return {}
+        sor = matrix[kod]
+        return {int(nap) + 1: self.statuszok[sor[nap]] for nap in np.flatnonzero(sor)}
+
+    def napi_keresek(self, ev, honap, nap):
+        """Egy nap kérései: {orvos: státusz}"""
+        matrix = self._matrixok.get((ev, honap))
+        if matrix is None:
+            return {}
+        oszlop = matrix[:, nap - 1]
+        return {self.orvosok[kod]: self.statuszok[oszlop[kod]] for kod in np.flatnonzero(oszlop)}
+
+    def szotar(self):
+        """A kérések beágyazott szótárként: {év: {hónap: {orvos: {nap: státusz}}}}"""
+        eredmeny = {}
+        for ev, honap in self.honapok():
+            orvosok = {
+                self.orvosok[kod]: self.orvos_keresei(ev, honap, self.orvosok[kod])
+                for kod in np.flatnonzero(self._matrixok[ev, honap].any(axis=1))
+            }
+            if orvosok:
+                eredmeny.setdefault(ev, {})[honap] = orvosok
+        return eredmeny
+
+    def masolat(self, fagyasztott=False):
+        """Másolat, amely a mátrixokat megosztja, és csak az első írásukkor másolja
+
+        fagyasztott=True esetén a másolat nem módosítható (pillanatképhez).
+        """
+        for matrix in self._matrixok.values():
+            matrix.flags.writeable = False
+        uj = KeresTar.__new__(KeresTar)
+        uj.orvosok = list(self.orvosok)
+        uj._orvos_kod = dict(self._orvos_kod)
+        uj.statuszok = list(self.statuszok)
+        uj._statusz_kod = dict(self._statusz_kod)
+        uj._tipus = self._tipus
+        uj._matrixok = dict(self._matrixok)
+        uj._fagyasztott = fagyasztott
+        return uj
+
+    def mentes(self, utvonal, tomoritett=False):
+        """Mentés .npz fájlba; memóriába képezni csak tömörítetlen mentést lehet
+
+        A státuszok szövegként kerülnek a fájlba.
+        """
+        honapok = self.honapok()
+        kocka = np.zeros((len(honapok), len(self.orvosok), NAPOK), dtype=self._tipus)
+        for i, kulcs in enumerate(honapok):
+            matrix = self._matrixok[kulcs]
+            kocka[i, :matrix.shape[0]] = matrix
+        mento = np.savez_compressed if tomoritett else np.savez
+        mento(
+            utvonal,
+            orvosok=np.array(self.orvosok, dtype=str),
+            statuszok=np.array([str(s) for s in self.statuszok[1:]], dtype=str),
+            honapok=np.array(honapok, dtype=np.int16).reshape(-1, 2),
+            kocka=kocka,
+        )
+
+    @classmethod
+    def betoltes(cls, utvonal, mmap=False):
+        """Mentett tár betöltése; mmap=True esetén a kérés mátrixok a fájlra mutatnak"""
+        with np.load(utvonal) as adatok:
+            tar = cls(adatok['orvosok'].tolist())
+            for statusz in adatok['statuszok'].tolist():
+                tar.statusz_kod(statusz)
+            honapok = [tuple(sor) for sor in adatok['honapok'].tolist()]
+            kocka = _npz_memmap(utvonal, 'kocka') if mmap else adatok['kocka']
+        tar._tipus = kocka.dtype.type
+        for i, (ev, honap) in enumerate(honapok):
+            tar._matrixok[ev, honap] = kocka[i]
+        return tar
@@ -0,0 +1,192 @@
+"""Szabad szöveges kivételek elemzése
+
+Soronként egy szabály:
+    Dr. Kiss 2024.01.15 szabadság                     -> DatumKivetel
+    Dr. Kiss 2024 február 5 továbbképzés              -> DatumKivetel
+    Dr. Kiss január 3-9 között konferencia            -> DatumKivetel (tartomány)
+    Dr. Kormos csak hétfőn tud dolgozni meg szerdán.  -> HetnapKivetel
+    Dr. Kormos nem dolgozhat Dr. Forró Tímeával.      -> ParTiltas
+
+A minták modulszinten előre fordítottak, a sorok eredménye pedig
+gyorsítótárban van, így egy újrafuttatáskor csak a megváltozott sorokat
+elemezzük újra. A hibák Diagnosztika elemként térnek vissza, a hívó dönti el,
+hogyan jeleníti meg őket.
+"""
+import re
+from collections import namedtuple
+from datetime import date, datetime
+from functools import lru_cache
+
+DatumKivetel = namedtuple('DatumKivetel', ['orvos', 'kezdet', 'veg', 'indok'])
+HetnapKivetel = namedtuple('HetnapKivetel', ['orvos', 'hetnapok'])
+ParTiltas = namedtuple('ParTiltas', ['orvos1', 'orvos2'])
+Diagnosztika = namedtuple('Diagnosztika', ['sor_szam', 'sor', 'uzenet'])
+ElemzesEredmeny = namedtuple('ElemzesEredmeny', ['szabalyok', 'diagnosztikak'])
+
+HONAPOK = {
+    'január': 1, 'február': 2, 'március': 3, 'április': 4,
+    'május': 5, 'június': 6, 'július': 7, 'augusztus': 8,
+    'szeptember': 9, 'október': 10, 'november': 11, 'december': 12,
+    'jan': 1, 'feb': 2, 'már': 3, 'ápr': 4, 'máj': 5, 'jún': 6,
+    'júl': 7, 'aug': 8, 'szept': 9, 'okt': 10, 'nov': 11, 'dec': 12
+}
+
+# A hét napjai alap- és "-n" ragos alakban (hétfőn, kedden, szerdán, ...)
+HETNAPOK = {}
+for _szam, _alap, _ragos in [
+    (0, 'hétfő', 'hétfőn'), (1, 'kedd', 'kedden'), (2, 'szerda', 'szerdán'),
+    (3, 'csütörtök', 'csütörtökön'), (4, 'péntek', 'pénteken'),
+    (5, 'szombat', 'szombaton'), (6, 'vasárnap', 'vasárnap'),
+]:
+    HETNAPOK[_alap] = HETNAPOK[_alap + 'n'] = HETNAPOK[_ragos] = _szam
+
+_PAROSITAS = re.compile(r'(?i)nem dolgozhat\s+(Dr\.?\s+\S+\s+\S+)')
+_IRASJEL = re.compile(r'[.,]')
+# A teljes dátumos tartományt (2024.01.01 - 2024.01.20) a sor egészében keressük,
+# hogy a rövid "nap-nap" minta ne vágja el, és a szóközök se tördeljék szét.
+_DATUM_TARTOMANY = re.compile(
+    r'(\d{4})[.-](\d{1,2})[.-](\d{1,2})\s*(?:és|-)?\s*(\d{4})[.-](\d{1,2})[.-](\d{1,2})'
+)
+_TARTOMANY_MINTAK = [
+    re.compile(r'(\d{1,2})[.-](\d{1,2})'),
+    re.compile(r'(\d{1,2})\s*(?:és|-)?\s*(\d{1,2})\s+között'),
+]
+_EV_HO_NAP = re.compile(r'(\d{4})-(\d{1,2})-(\d{1,2})')
+_NAP_HO_EV = re.compile(r'(\d{1,2})-(\d{1,2})-(\d{4})')
+
+
+def _datum(ev, honap, nap):
+    """Érvényes dátum vagy None"""
+    try:
+        return date(int(ev), int(honap), int(nap))
+    except (ValueError, OverflowError):
+        return None
+
+
+def egyszeru_datum(szavak):
+    """Az első felismerhető dátum a szavak között (2024.01.15, 15.01.2024, 2024 január 15)"""
+    for i, szo in enumerate(szavak):
+        datum_str = szo.replace('.', '-')
+        match = _EV_HO_NAP.fullmatch(datum_str)
+        if match:
+            datum = _datum(*match.groups())
+            if datum:
+                return datum
+        match = _NAP_HO_EV.fullmatch(datum_str)
+        if match:
+            datum = _datum(match.group(3), match.group(2), match.group(1))
+            if datum:
+                return datum
+
+        if i + 2 < len(szavak) and szo.isdigit() and szavak[i + 2].isdigit():
+            honap = HONAPOK.get(szavak[i + 1].lower())
+            if honap:
+                datum = _datum(szo, honap, szavak[i + 2])
+                if datum:
+                    return datum
+    return None
+
+
+def _hetnapok(szavak):
+    hetnapok = []
+    for szo in szavak:
+        tiszta = _IRASJEL.sub('', szo).lower()
+        if tiszta in HETNAPOK:
+            hetnapok.append(HETNAPOK[tiszta])
+    return tuple(hetnapok)
+
+
+@lru_cache(maxsize=4096)
+def sor_elemzes(sor, alap_ev):
+    """Egy sor elemzése: szabály, hibaüzenet (str) vagy None (üres sor)
+
+    Az alap_ev akkor számít, ha a tartományos sorban nincs évszám.
+    """
+    szavak = sor.strip().split()
+    if len(szavak) < 2:
+        return None
+
+    # Az orvos neve (ha "Dr" szerepel, két szóból)
+    nev_vege = 2 if szavak[0].startswith('Dr') else 1
+    orvos_nev = ' '.join(szavak[:nev_vege])
+    kisbetus = sor.lower()
+
+    if "nem dolgozhat" in kisbetus:
+        match = _PAROSITAS.search(sor)
+        if match:
+            return ParTiltas(orvos_nev, match.group(1).strip())
+        return f"Nem sikerült feldolgozni a párosítási kivételt ebben a sorban: {sor}"
+
+    if "csak" in kisbetus:
+        hetnapok = _hetnapok(szavak)
+        if hetnapok:
+            return HetnapKivetel(orvos_nev, hetnapok)
+
+    datum_index = nev_vege
+    maradek = ' '.join(szavak[nev_vege:])
+    tartomany_match = _DATUM_TARTOMANY.search(maradek)
+    if tartomany_match:
+        # A tartomány utolsó szava után kezdődik az indok
+        datum_index = nev_vege + len(maradek[:tartomany_match.end()].split()) - 1
+    else:
+        for i in range(nev_vege, len(szavak)):
+            szo = szavak[i]
+            if "között" in szo or "-" in szo:
+                tartomany_text = ' '.join(szavak[nev_vege:i + 2])
+                for minta in _TARTOMANY_MINTAK:
+                    tartomany_match = minta.search(tartomany_text)
+                    if tartomany_match:
+                        datum_index = i
+                        break
+                if tartomany_match:
+                    break
+
+    if tartomany_match:
+        csoportok = tartomany_match.groups()
+        if len(csoportok) == 6:
+            kezdet = _datum(*csoportok[:3])
+            veg = _datum(*csoportok[3:])
+        else:
+            honap = None
+            ev = alap_ev
+            for szo in szavak[:datum_index]:
+                if szo.lower() in HONAPOK:
+                    honap = HONAPOK[szo.lower()]
+                elif szo.isdigit() and len(szo) == 4:
+                    ev = int(szo)
+            if honap is None:
+                return f"Hiba a sor feldolgozása során: {sor} - Nem található hónap megjelölés"
+            kezdet = _datum(ev, honap, csoportok[0])
+            veg = _datum(ev, honap, csoportok[1])
+        if not kezdet or not veg:
+            return f"Hiba a sor feldolgozása során: {sor} - érvénytelen dátum"
+        if kezdet > veg:
+            return f"Hiba a sor feldolgozása során: {sor} - a tartomány vége korábbi a kezdeténél"
+    else:
+        kezdet = veg = egyszeru_datum(szavak[datum_index:])
+        if not kezdet:
+            return f"Nem sikerült feldolgozni a dátumot ebben a sorban: {sor}"
+
+    indok_szavak = [
+        szo for szo in szavak[datum_index + 1:]
+        if not any(k in szo.lower() for k in ['között', 'és'])
+    ]
+    indok = ' '.join(indok_szavak) if indok_szavak else 'nem elérhető'
+    return DatumKivetel(orvos_nev, kezdet, veg, indok)
+
+
+def elemzes(szoveg, alap_ev=None):
+    """A teljes kivétel szöveg elemzése szabályokra és diagnosztikákra"""
+    if alap_ev is None:
+        alap_ev = datetime.now().year
+    szabalyok = []
+    diagnosztikak = []
+    for sor_szam, sor in enumerate((szoveg or '').split('\n'), 1):
+        if not sor.strip():
+            continue
+        eredmeny = sor_elemzes(sor, alap_ev)
+        if isinstance(eredmeny, str):
+            diagnosztikak.append(Diagnosztika(sor_szam, sor, eredmeny))
+        elif eredmeny is not None:
+            szabalyok.append(eredmeny)
+    return ElemzesEredmeny(szabalyok, diagnosztikak)
@@ -0,0 +1,117 @@
+"""Dátum kivételek és párosítási tiltások indexelt tára"""
+import calendar
+from bisect import bisect_left, bisect_right
+from datetime import date
+
+
+class KorlatozasTar:
+    """Indexelt tár a dátum kivételekhez és a párosítási tiltásokhoz
+    
+    A tartományként megadott kivételek tartományok maradnak: orvosonként
+    rendezett, összevont intervallumokban keresünk felezéssel (O(log n)).
+    A tiltott párok szimmetrikus szomszédsági halmazban vannak (O(1)).
+    """
+    def __init__(self):
+        self._idoszakok = []  # [(orvos, kezdet, veg, indok)] felvételi sorrendben
+        self._orvos_idoszakok = {}  # {orvos: [(kezdet ordinal, veg ordinal)]}
+        self._osszevont = {}  # {orvos: (kezdetek, vegek)} diszjunkt, rendezett
+        self._parok = []  # [(orvos1, orvos2)] felvételi sorrendben
+        self._tiltott_partnerek = {}  # {orvos: {orvos}}
+
+    def torles(self):
+        self.__init__()
+
+    def idoszak_hozzaadas(self, orvos, kezdet, veg, indok):
+        """Nem elérhető időszak felvétele (a két végpont is beleszámít)"""
+        if kezdet > veg:
+            return
+        self._idoszakok.append((orvos, kezdet, veg, indok))
+        self._orvos_idoszakok.setdefault(orvos, []).append((kezdet.toordinal(), veg.toordinal()))
+        self._osszevont.pop(orvos, None)
+
+    def idoszak_torles(self, orvos, kezdet, veg, indok):
+        """Egy korábban felvett időszak eltávolítása; igaz, ha megtalálta"""
+        try:
+            self._idoszakok.remove((orvos, kezdet, veg, indok))
+        except ValueError:
+            return False
+        intervallumok = self._orvos_idoszakok[orvos]
+        intervallumok.remove((kezdet.toordinal(), veg.toordinal()))
+        if not intervallumok:
+            del self._orvos_idoszakok[orvos]
+        self._osszevont.pop(orvos, None)
+        return True
+
+    def _orvos_intervallumok(self, orvos):
+        """Az orvos időszakai összevonva, kezdet szerint rendezve"""
+        if orvos not in self._osszevont:
+            kezdetek, vegek = [], []
+            for kezdet, veg in sorted(self._orvos_idoszakok.get(orvos, ())):
+                if vegek and kezdet <= vegek[-1] + 1:
+                    vegek[-1] = max(vegek[-1], veg)
+                else:
+                    kezdetek.append(kezdet)
+                    vegek.append(veg)
+            self._osszevont[orvos] = (kezdetek, vegek)
+        return self._osszevont[orvos]
+
+    def nem_elerheto(self, orvos, datum):
+        """Igaz, ha a dátum az orvos valamelyik kivételes időszakába esik"""
+        if orvos not in self._orvos_idoszakok:
+            return False
+        kezdetek, vegek = self._orvos_intervallumok(orvos)
+        nap = datum.toordinal()
+        i = bisect_right(kezdetek, nap) - 1
+        return i >= 0 and vegek[i] >= nap
+
+    def honap_tiltasai(self, orvos, ev, honap):
+        """Az orvos tiltott napjai a hónapban (első nap, utolsó nap) párokként"""
+        if orvos not in self._orvos_idoszakok:
+            return
+        kezdetek, vegek = self._orvos_intervallumok(orvos)
+        ho_eleje = date(ev, honap, 1).toordinal()
+        ho_vege = ho_eleje + calendar.monthrange(ev, honap)[1] - 1
+        for i in range(bisect_left(vegek, ho_eleje), len(kezdetek)):
+            if kezdetek[i] > ho_vege:
+                break
+            yield max(kezdetek[i], ho_eleje) - ho_eleje + 1, min(vegek[i], ho_vege) - ho_eleje + 1
+
+    def orvosok(self):
+        """Azok az orvosok, akikhez dátum kivétel tartozik"""
+        return self._orvos_idoszakok.keys()
+
+    def idoszakok(self):
+        """A felvett időszakok (orvos, kezdet, vég, indok) formában"""
+        return [
+            (orvos, kezdet.strftime('%Y-%m-%d'), veg.strftime('%Y-%m-%d'), indok)
+            for orvos, kezdet, veg, indok in self._idoszakok
+        ]
+
+    def par_tiltas(self, orvos1, orvos2):
+        """Két orvos nem dolgozhat ugyanazon a napon"""
+        self._parok.append((orvos1, orvos2))
+        self._tiltott_partnerek.setdefault(orvos1, set()).add(orvos2)
+        self._tiltott_partnerek.setdefault(orvos2, set()).add(orvos1)
+
+    def par_torles(self, orvos1, orvos2):
+        """Egy párosítási tiltás eltávolítása (bármelyik sorrendben); igaz, ha megtalálta"""
+        for par in ((orvos1, orvos2), (orvos2, orvos1)):
+            if par in self._parok:
+                self._parok.remove(par)
+                break
+        else:
+            return False
+        # A szomszédság csak akkor szűnik meg, ha nem maradt másik azonos tiltás
+        if (orvos1, orvos2) not in self._parok and (orvos2, orvos1) not in self._parok:
+            self._tiltott_partnerek[orvos1].discard(orvos2)
+            self._tiltott_partnerek[orvos2].discard(orvos1)
+        return True
+
+    def tiltott_partnerek(self, orvos):
+        return self._tiltott_partnerek.get(orvos, frozenset())
+
+    def parosithato(self, orvos1, orvos2):
+        return orvos2 not in self._tiltott_partnerek.get(orvos1, ())
+
+    def parok(self):
+        return list(self._parok)
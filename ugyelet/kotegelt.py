@@ -0,0 +1,198 @@
+"""Több hónapos (akár több éves) beosztás egy futtatásban
+
+A hónapokat időrendben generáljuk ugyanazzal a generátorral, így az
+ügyeletszámok determinisztikusan öröklődnek hónapról hónapra. Az egymástól
+független forgatókönyvek (más kivétel szöveg, megoldó vagy seed) külön
+folyamatokban futnak, a végén pedig egyetlen Excel fájlba kerülnek.
+
+Parancssorból (a kimenet .xlsx, .csv vagy .parquet):
+    python -m ugyelet keresek.xlsx --tol 2024-01 --ig 2024-12 \\
+        --kivetelek kivetelek.txt --kimenet beosztas_2024.xlsx
+
+Több műszakhoz és osztályhoz a --muszakok muszakok.json beállítás adható
+meg (lásd muszakok.py).
+
+A --nyilvantartas ugyeletek.sqlite kapcsolóval az első hónap a tartós
+nyilvántartás előző hónapjainak (alapból 12) ügyeletszámaiból indul, a
+--rogzites pedig az eredményt is beírja (lásd nyilvantartas.py).
+
+A beolvasott kérések --mentes keresek.npz kapcsolóval elmenthetők, és a
+következő futtatások az Excel helyett ezt a fájlt kaphatják bemenetként
+(a kérés mátrixok ilyenkor memóriába képezve töltődnek be).
+"""
+import argparse
+import logging
+import sys
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from . import muszakok
+from .generator import BeolvasottKeresek, MunkafuzetCache, UgyeletiBeosztasGenerator
+from .keresek import KeresTar
+from .nyilvantartas import Nyilvantartas, elozo_idoszak
+from .optimalis_beosztas import MEGOLDOK
+
+# Egy független futtatás beállításai
+Forgatokonyv = namedtuple('Forgatokonyv', ['nev', 'kivetelek_szoveg', 'megoldo', 'beallitasok'])
+# Egy forgatókönyv eredménye: {(év, hónap): beosztás}, {orvos: ügyeletszám}, [(év, hónap, üzenet)]
+KotegEredmeny = namedtuple('KotegEredmeny', ['nev', 'beosztasok', 'ugyeletszamok', 'figyelmeztetesek'])
+
+
+def honapok_tartomanya(tol, ig):
+    """Az (év, hónap) párok tol-tól ig-ig, mindkét végpontot beleértve"""
+    ev, honap = tol
+    honapok = []
+    while (ev, honap) <= tuple(ig):
+        honapok.append((ev, honap))
+        ev, honap = (ev + 1, 1) if honap == 12 else (ev, honap + 1)
+    return honapok
+
+
+def kotegelt_beosztas(pillanatkep, honapok, forgatokonyv, elozmenyek=None):
+    """Egy forgatókönyv összes hónapja időrendben, öröklődő ügyeletszámokkal
+
+    elozmenyek: az első hónap előtti {orvos: ügyeletszám} (pl. a nyilvántartásból)
+    """
+    generator = UgyeletiBeosztasGenerator.pillanatkepbol(pillanatkep)
+    if elozmenyek:
+        generator.elozmenyek_beallitas(elozmenyek)
+    figyelmeztetesek = [
+        (None, None, diagnosztika.uzenet)
+        for diagnosztika in generator.kivetel_hozzaadas(forgatokonyv.kivetelek_szoveg)
+    ]
+    beosztasok = {}
+    for ev, honap in sorted(honapok):
+        beosztas, uzenetek = generator.beosztas_keszites(
+            ev, honap, forgatokonyv.megoldo, **forgatokonyv.beallitasok
+        )
+        beosztasok[ev, honap] = beosztas
+        figyelmeztetesek.extend((ev, honap, uzenet) for uzenet in uzenetek)
+    return KotegEredmeny(
+        forgatokonyv.nev,
+        beosztasok,
+        {orvos: adatok['ugyeletek_szama'] for orvos, adatok in generator.orvosok.items()},
+        figyelmeztetesek,
+    )
+
+
+def forgatokonyvek_futtatasa(pillanatkep, honapok, forgatokonyvek, max_workers=None, elozmenyek=None):
+    """Független forgatókönyvek párhuzamosan; az eredmények a bemenet sorrendjében"""
+    if len(forgatokonyvek) <= 1 or max_workers == 1:
+        return [kotegelt_beosztas(pillanatkep, honapok, f, elozmenyek) for f in forgatokonyvek]
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        jovok = [
+            executor.submit(kotegelt_beosztas, pillanatkep, honapok, forgatokonyv, elozmenyek)
+            for forgatokonyv in forgatokonyvek
+        ]
+        return [jovo.result() for jovo in jovok]
+
+
+def _ev_honap(szoveg):
+    try:
+        ev, honap = (int(resz) for resz in szoveg.replace('.', '-').split('-')[:2])
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"ÉÉÉÉ-HH formátum szükséges: {szoveg}")
+    if not 1 <= honap <= 12:
+        raise argparse.ArgumentTypeError(f"Érvénytelen hónap: {szoveg}")
+    return ev, honap
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Több hónapos ügyeleti beosztás generálása")
+    parser.add_argument('munkafuzet', help="ügyeleti kérések Excel fájlja vagy mentett .npz kérés tára")
+    parser.add_argument('--tol', type=_ev_honap, required=True, help="első hónap (ÉÉÉÉ-HH)")
+    parser.add_argument('--ig', type=_ev_honap, help="utolsó hónap (ÉÉÉÉ-HH), alapból a --tol hónapja")
+    parser.add_argument('--kivetelek', action='append', default=[],
+                        help="kivétel szövegfájl; többször megadva mindegyik külön forgatókönyv")
+    parser.add_argument('--megoldo', default='moho', choices=list(MEGOLDOK),
+                        help="'moho', 'veletlen_moho', 'cpsat' vagy 'tobbinditas' "
+                             "(párhuzamos véletlenített indítások, a legjobb seed a naplóban)")
+    parser.add_argument('--muszakok', help="több műszakos, több osztályos beállítás JSON fájlja "
+                                           "(alapból naponta két orvos egy műszakban)")
+    parser.add_argument('--idokorlat', type=float, default=10.0,
+                        help="CP-SAT, illetve többszöri indítás időkorlát hónaponként")
+    parser.add_argument('--seed', type=int, action='append', default=[],
+                        help="megoldó seed; többször megadva mindegyik külön forgatókönyv")
+    parser.add_argument('--munkasok', type=int, default=None, help="párhuzamos folyamatok száma")
+    parser.add_argument('--kimenet', default='ugyeleti_beosztas.xlsx',
+                        help="a kimenet útvonala; .csv vagy .parquet végződésnél csak a beosztás")
+    parser.add_argument('--naptar-nelkul', action='store_true',
+                        help="az Excel kimenet hónaponkénti naptár lapjainak kihagyása")
+    parser.add_argument('--streaming', action='store_true',
+                        help="a munkafüzet soronkénti olvasása (nagyon nagy fájlokhoz)")
+    parser.add_argument('--mentes', help="a beolvasott kérések mentése .npz fájlba")
+    parser.add_argument('--nyilvantartas', help="SQLite méltányossági nyilvántartás; az első hónap "
+                                                "a korábbi ügyeletszámokból indul")
+    parser.add_argument('--elozo-honapok', type=int, default=12,
+                        help="ennyi korábbi hónap ügyeleteit vesszük figyelembe a nyilvántartásból")
+    parser.add_argument('--rogzites', action='store_true',
+                        help="az eredmény beírása a nyilvántartásba (csak egy forgatókönyvvel)")
+    args = parser.parse_args(argv)
+    if args.ig and args.ig < args.tol:
+        parser.error("az --ig hónap nem lehet korábbi a --tol hónapnál")
+    logging.basicConfig(format='%(levelname)s: %(message)s', level=logging.INFO)
+
+    megoldo = args.megoldo
+    if args.muszakok:
+        if args.megoldo != 'moho':
+            parser.error("a --muszakok csak a mohó megoldóval használható")
+        with open(args.muszakok, encoding='utf-8') as f:
+            try:
+                megoldo = muszakok.megoldo(muszakok.beallitas_betoltes(f.read()))
+            except ValueError as e:
+                parser.error(str(e))
+
+    if args.munkafuzet.lower().endswith('.npz'):
+        keresek = KeresTar.betoltes(args.munkafuzet, mmap=True)
+        pillanatkep = BeolvasottKeresek(tuple(keresek.orvosok), keresek.masolat(fagyasztott=True))
+    else:
+        with open(args.munkafuzet, 'rb') as f:
+            pillanatkep = MunkafuzetCache(max_meret=1).beolvasas(f.read(), args.streaming)
+        if pillanatkep is None:
+            return 1
+    if args.mentes:
+        pillanatkep.keresek.mentes(args.mentes)
+
+    kivetel_szovegek = []
+    for utvonal in args.kivetelek or [None]:
+        if utvonal is None:
+            kivetel_szovegek.append(('alap', ''))
+        else:
+            with open(utvonal, encoding='utf-8') as f:
+                kivetel_szovegek.append((utvonal, f.read()))
+    forgatokonyvek = [
+        Forgatokonyv(
+            nev if len(args.seed) <= 1 else f"{nev} (seed {seed})",
+            szoveg,
+            megoldo,
+            {'idokorlat': args.idokorlat, 'seed': seed},
+        )
+        for nev, szoveg in kivetel_szovegek
+        for seed in args.seed or [0]
+    ]
+    if args.rogzites and (not args.nyilvantartas or len(forgatokonyvek) > 1):
+        parser.error("a --rogzites egyetlen forgatókönyvvel és --nyilvantartas mellett használható")
+
+    from .export import kotegelt_export
+    
+    honapok = honapok_tartomanya(args.tol, args.ig or args.tol)
+    nyilvantartas = Nyilvantartas(args.nyilvantartas) if args.nyilvantartas else None
+    elozmenyek = None
+    if nyilvantartas is not None:
+        elozmenyek = nyilvantartas.ugyeletszamok(*elozo_idoszak(*honapok[0], args.elozo_honapok))
+    eredmenyek = forgatokonyvek_futtatasa(pillanatkep, honapok, forgatokonyvek, args.munkasok, elozmenyek)
+    if args.rogzites:
+        for eredmeny in eredmenyek:
+            for beosztas in eredmeny.beosztasok.values():
+                nyilvantartas.rogzites(beosztas, eredmeny.nev)
+    kotegelt_export(eredmenyek, args.kimenet, naptar=not args.naptar_nelkul)
+    for eredmeny in eredmenyek:
+        for ev, honap, uzenet in eredmeny.figyelmeztetesek:
+            hely = f"{ev}-{honap:02d}" if ev else "kivételek"
+            print(f"[{eredmeny.nev}] {hely}: {uzenet}", file=sys.stderr)
+    print(f"{len(forgatokonyvek)} forgatókönyv, {len(honapok)} hónap -> {args.kimenet}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,116 @@
+"""Szakaszonkénti időmérés és számlálók
+
+A generátor a fő szakaszokat (Excel beolvasás, kivétel elemzés, elérhetőségi
+mátrix, beosztás) és néhány számlálót (beosztott napok, elérhetőségi
+lekérdezések, párosítási ellenőrzések, figyelmeztetések) egy mérő objektumnak
+jelzi, amelynek szakasz(nev) környezetkezelője és szamlalo(nev, n) metódusa van.
+
+Alapból a KIKAPCSOLT mérő fut: a metódusai nem csinálnak semmit, a forró
+ciklusok pedig helyben számolnak, és szakaszonként csak egyszer jelentenek,
+így kikapcsolt méréskor a többletköltség elhanyagolható.
+
+    meres = Meres()
+    generator = UgyeletiBeosztasGenerator(meres=meres)
+    ...
+    print(meres.prometheus())
+
+A szakaszok egymásba ágyazódhatnak (pl. az elérhetőségi mátrix a beosztáson
+belül készül), az idők a beágyazott szakaszokat is tartalmazzák.
+"""
+import json
+import time
+from collections import Counter
+from contextlib import nullcontext
+
+
+class Meres:
+    """Szakaszidők és számlálók gyűjtése
+
+    visszahivas: opcionális (nev, ido_mp) függvény, minden szakasz végén hívódik
+    """
+    def __init__(self, visszahivas=None):
+        self.visszahivas = visszahivas
+        self.szakaszok = {}  # {név: [hívások száma, összes idő másodpercben]}
+        self.szamlalok = Counter()
+
+    def szakasz(self, nev):
+        return _Szakasz(self, nev)
+
+    def szamlalo(self, nev, n=1):
+        self.szamlalok[nev] += n
+
+    def _rogzites(self, nev, ido):
+        adat = self.szakaszok.setdefault(nev, [0, 0.0])
+        adat[0] += 1
+        adat[1] += ido
+        if self.visszahivas is not None:
+            self.visszahivas(nev, ido)
+
+    def nullazas(self):
+        self.szakaszok.clear()
+        self.szamlalok.clear()
+
+    def osszesites(self):
+        """{'szakaszok': {név: {'hivasok', 'ido_s'}}, 'szamlalok': {név: érték}}"""
+        return {
+            'szakaszok': {
+                nev: {'hivasok': hivasok, 'ido_s': ido}
+                for nev, (hivasok, ido) in self.szakaszok.items()
+            },
+            'szamlalok': dict(self.szamlalok),
+        }
+
+    def json(self, **kwargs):
+        return json.dumps(self.osszesites(), ensure_ascii=False, **kwargs)
+
+    def prometheus(self, elotag='ugyelet'):
+        """Az eredmények Prometheus szöveges formátumban"""
+        sorok = [
+            f"# TYPE {elotag}_szakasz_ido_masodperc_total counter",
+            *(
+                f'{elotag}_szakasz_ido_masodperc_total{{szakasz="{nev}"}} {ido:.6f}'
+                for nev, (_, ido) in self.szakaszok.items()
+            ),
+            f"# TYPE {elotag}_szakasz_hivasok_total counter",
+            *(
+                f'{elotag}_szakasz_hivasok_total{{szakasz="{nev}"}} {hivasok}'
+                for nev, (hivasok, _) in self.szakaszok.items()
+            ),
+        ]
+        for nev, ertek in self.szamlalok.items():
+            sorok.append(f"# TYPE {elotag}_{nev}_total counter")
+            sorok.append(f"{elotag}_{nev}_total {ertek}")
+        return '\n'.join(sorok) + '\n'
+
+
+class _Szakasz:
+    __slots__ = ('meres', 'nev', 'kezdet')
+
+    def __init__(self, meres, nev):
+        self.meres = meres
+        self.nev = nev
+
+    def __enter__(self):
+        self.kezdet = time.perf_counter()
+        return self
+
+    def __exit__(self, *hiba):
+        self.meres._rogzites(self.nev, time.perf_counter() - self.kezdet)
+        return False
+
+
+class _KikapcsoltMeres:
+    """Mérés nélküli alapértelmezés; hamis értékű, így a drágább számolás kihagyható"""
+    _ures = nullcontext()
+
+    def __bool__(self):
+        return False
+
+    def szakasz(self, nev):
+        return self._ures
+
+    def szamlalo(self, nev, n=1):
+        pass
+
+
+KIKAPCSOLT = _KikapcsoltMeres()
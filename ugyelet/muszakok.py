@@ -0,0 +1,234 @@
+"""Több műszakos, több osztályos beosztási modell
+
+Egy nap műszakjait (pl. nappali, éjszakai, hétvégi) osztályonként adjuk meg,
+mindegyikhez a szükséges létszámmal, a beosztható orvosok képesítéseivel és
+a hét napjaival, amikor a műszak létezik. Műszak beállítás nélkül marad a
+korábbi működés: egyetlen, napi két orvosos műszak a megszokott megoldókkal.
+
+Beállítás JSON-ból (a napok 0 = hétfő ... 6 = vasárnap):
+    {
+      "muszakok": [
+        {"nev": "nappali", "osztaly": "Belgyógyászat", "letszam": 2},
+        {"nev": "éjszakai", "osztaly": "Belgyógyászat", "letszam": 1,
+         "kepesitesek": ["szakorvos"]},
+        {"nev": "hétvégi", "osztaly": "Sebészet", "letszam": 3, "napok": [5, 6]}
+      ],
+      "orvosok": {
+        "Dr. Kiss Péter": {"osztalyok": ["Belgyógyászat"], "kepesitesek": ["szakorvos"]}
+      }
+    }
+
+Osztályhoz kötött műszakba csak az adott osztály orvosa, képesítéshez kötött
+műszakba csak az összes képesítéssel rendelkező orvos osztható be. Egy orvos
+naponta legfeljebb egy műszakban dolgozik, a párosítási tiltások egy
+műszakon belül érvényesek.
+
+A jogosultság műszakonként egy előre kiszámolt logikai vektor az orvosok
+felett (képesítésenként és osztályonként egy indexvektor metszete), így egy
+nap jelöltjei az elérhetőségi oszlop, a jogosultság és a napi foglaltság
+maszkjának metszete: a napi munka nem függ a kivételek és tiltások számától.
+"""
+import calendar
+import json
+from collections import namedtuple
+from datetime import date
+from functools import partial
+
+import numpy as np
+
+from .optimalis_beosztas import NAPI_LETSZAM, ugyeletszamok
+
+HET_NAPJAI = tuple(range(7))
+
+
+class Muszak(namedtuple('Muszak', ['nev', 'osztaly', 'letszam', 'kepesitesek', 'napok'],
+                        defaults=(None, NAPI_LETSZAM, frozenset(), HET_NAPJAI))):
+    """Egy napi műszak: név, osztály (vagy None), létszám, képesítések, hét napjai"""
+    __slots__ = ()
+
+    @property
+    def kulcs(self):
+        """A műszak egyedi neve a beosztásban és az exportban"""
+        return f"{self.osztaly} / {self.nev}" if self.osztaly else self.nev
+
+
+# A műszakok sorrendje a napi kiosztás sorrendje; az orvosok osztályai és
+# képesítései {orvos: frozenset} alakban
+MuszakBeallitas = namedtuple('MuszakBeallitas', ['muszakok', 'orvos_osztalyok', 'orvos_kepesitesek'])
+
+
+class MuszakBeosztas(dict):
+    """Több műszakos havi beosztás: {műszak kulcs: {dátum szöveg: [orvosok]}}
+
+    Minden érték egy szokásos egy műszakos beosztás.
+    """
+    __slots__ = ()
+
+
+def napi_beosztasok(beosztas):
+    """(dátum, műszak kulcs vagy None, [orvosok]) egy- és több műszakos beosztásból
+
+    A sorok dátum, azon belül műszak sorrendben jönnek; az egy műszakos
+    beosztás műszak kulcsa None.
+    """
+    if not isinstance(beosztas, MuszakBeosztas):
+        for datum in sorted(beosztas):
+            yield datum, None, beosztas[datum]
+        return
+    for datum in sorted({datum for muszak in beosztas.values() for datum in muszak}):
+        for kulcs, muszak in beosztas.items():
+            if datum in muszak:
+                yield datum, kulcs, muszak[datum]
+
+
+def _szoveg_lista(ertek, mezo, hol):
+    """Szövegek listája a beállításból frozenset-ként; más típusnál ValueError"""
+    if not isinstance(ertek, list) or not all(isinstance(elem, str) for elem in ertek):
+        raise ValueError(f"A(z) '{mezo}' mezőnek szövegek listájának kell lennie ({hol})")
+    return frozenset(ertek)
+
+
+def _muszak_betoltes(i, elem):
+    if not isinstance(elem, dict) or not isinstance(elem.get('nev'), str) or not elem['nev']:
+        raise ValueError(f"A(z) {i}. műszaknak nincs neve")
+    nev = elem['nev']
+    osztaly = elem.get('osztaly')
+    if osztaly is not None and not isinstance(osztaly, str):
+        raise ValueError(f"Az osztálynak szövegnek kell lennie a(z) {nev} műszakban")
+    letszam = elem.get('letszam', NAPI_LETSZAM)
+    if not isinstance(letszam, int) or isinstance(letszam, bool) or letszam < 1:
+        raise ValueError(f"Érvénytelen létszám a(z) {nev} műszakban: {letszam}")
+    napok = elem.get('napok', list(HET_NAPJAI))
+    if (not isinstance(napok, list) or not napok
+            or any(not isinstance(nap, int) or isinstance(nap, bool) or nap not in HET_NAPJAI
+                   for nap in napok)):
+        raise ValueError(f"Érvénytelen napok a(z) {nev} műszakban (0 = hétfő ... 6 = vasárnap)")
+    kepesitesek = _szoveg_lista(elem.get('kepesitesek', []), 'kepesitesek', f"{nev} műszak")
+    return Muszak(nev, osztaly, letszam, kepesitesek, tuple(sorted(set(napok))))
+
+
+def beallitas_betoltes(adat):
+    """MuszakBeallitas egy JSON szövegből vagy az abból olvasott szótárból
+
+    Hibás beállításnál (szintaxis vagy bármely mező típusa) ValueError a hiba leírásával.
+    """
+    if isinstance(adat, str):
+        try:
+            adat = json.loads(adat)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Hibás JSON a műszak beállításban: {e}")
+    if not isinstance(adat, dict) or not isinstance(adat.get('muszakok'), list) or not adat['muszakok']:
+        raise ValueError("A műszak beállításban legalább egy műszakot meg kell adni ('muszakok' lista)")
+
+    muszakok = [_muszak_betoltes(i, elem) for i, elem in enumerate(adat['muszakok'], 1)]
+    kulcsok = [muszak.kulcs for muszak in muszakok]
+    if len(set(kulcsok)) != len(kulcsok):
+        raise ValueError("Két műszaknak azonos az osztálya és a neve")
+
+    orvosok = adat.get('orvosok', {})
+    if not isinstance(orvosok, dict) or not all(isinstance(adatok, dict) for adatok in orvosok.values()):
+        raise ValueError("Az 'orvosok' mezőnek {orvos neve: {\"osztalyok\": [...], \"kepesitesek\": [...]}} alakúnak kell lennie")
+    return MuszakBeallitas(
+        tuple(muszakok),
+        {orvos: _szoveg_lista(adatok.get('osztalyok', []), 'osztalyok', orvos) for orvos, adatok in orvosok.items()},
+        {orvos: _szoveg_lista(adatok.get('kepesitesek', []), 'kepesitesek', orvos) for orvos, adatok in orvosok.items()},
+    )
+
+
+def jogosultsagi_maszkok(orvos_lista, beallitas):
+    """{műszak kulcs: logikai vektor az orvos_lista felett}, ki osztható be a műszakba"""
+    index = {orvos: i for i, orvos in enumerate(orvos_lista)}
+
+    def tulajdonsag_index(orvos_tulajdonsagok):
+        # {tulajdonság: logikai vektor}: kinek van meg az adott osztály / képesítés
+        vektorok = {}
+        for orvos, tulajdonsagok in orvos_tulajdonsagok.items():
+            i = index.get(orvos)
+            if i is None:
+                continue
+            for tulajdonsag in tulajdonsagok:
+                vektorok.setdefault(tulajdonsag, np.zeros(len(orvos_lista), dtype=bool))[i] = True
+        return vektorok
+
+    osztalyok = tulajdonsag_index(beallitas.orvos_osztalyok)
+    kepesitesek = tulajdonsag_index(beallitas.orvos_kepesitesek)
+    senki = np.zeros(len(orvos_lista), dtype=bool)
+    maszkok = {}
+    for muszak in beallitas.muszakok:
+        maszk = np.ones(len(orvos_lista), dtype=bool)
+        if muszak.osztaly is not None:
+            maszk &= osztalyok.get(muszak.osztaly, senki)
+        for kepesites in muszak.kepesitesek:
+            maszk &= kepesitesek.get(kepesites, senki)
+        maszkok[muszak.kulcs] = maszk
+    return maszkok
+
+
+def moho_muszak_beosztas(generator, ev, honap, beallitas, szamok):
+    """Mohó kiosztás műszakonként a legkevesebb ügyeletet teljesítő jogosult orvosokkal
+
+    A szamok ({orvos: ügyeletek száma}) szótárat helyben frissíti, a
+    generátor állapotát nem módosítja. Visszaadja a MuszakBeosztas-t és a
+    figyelmeztetéseket; a hiányosan betöltött műszakban a talált orvosok maradnak.
+    A napon belül a legszűkösebb műszak kap először orvost.
+    """
+    matrix = generator.elerhetosegi_matrix(ev, honap)
+    orvos_lista = list(generator._orvos_index)
+    maszkok = jogosultsagi_maszkok(orvos_lista, beallitas)
+    terheles = np.array([szamok[orvos] for orvos in orvos_lista], dtype=np.int64)
+    elso_hetnap, napok_szama = calendar.monthrange(ev, honap)
+
+    beosztasok = MuszakBeosztas((muszak.kulcs, {}) for muszak in beallitas.muszakok)
+    figyelmeztetesek = []
+    ellenorzesek = 0
+    for nap in range(napok_szama):
+        generator.haladas_jelzes('beosztas', nap + 1, napok_szama)
+        datum_str = date(ev, honap, nap + 1).strftime('%Y-%m-%d')
+        hetnap = (elso_hetnap + nap) % 7
+        szabad = matrix[:, nap].copy()  # elérhető és aznap még nincs beosztva
+        # A legszűkösebb műszak (legkevesebb tartalék jelölt) kap először orvost
+        napi_muszakok = sorted(
+            (muszak for muszak in beallitas.muszakok if hetnap in muszak.napok),
+            key=lambda muszak: np.count_nonzero(szabad & maszkok[muszak.kulcs]) - muszak.letszam
+        )
+        for muszak in napi_muszakok:
+            jelolt = szabad & maszkok[muszak.kulcs]
+            napi = []
+            while len(napi) < muszak.letszam:
+                indexek = np.flatnonzero(jelolt)
+                if not len(indexek):
+                    figyelmeztetesek.append(
+                        f"Nem sikerült {muszak.letszam} orvost beosztani a(z) {muszak.kulcs} "
+                        f"műszakba: {datum_str} ({len(napi)} jogosult orvos volt elérhető)"
+                    )
+                    break
+                i = indexek[np.argmin(terheles[indexek])]
+                orvos = orvos_lista[i]
+                napi.append(orvos)
+                terheles[i] += 1
+                jelolt[i] = szabad[i] = False
+                # a kiválasztott orvos tiltott partnerei ebben a műszakban kiesnek
+                for partner in generator.korlatozasok.tiltott_partnerek(orvos):
+                    j = generator._orvos_index.get(partner)
+                    if j is not None:
+                        jelolt[j] = False
+                ellenorzesek += len(indexek)
+            beosztasok[muszak.kulcs][datum_str] = napi
+
+    for i, orvos in enumerate(orvos_lista):
+        szamok[orvos] = int(terheles[i])
+    generator.meres.szamlalo('parositasi_ellenorzesek', ellenorzesek)
+    return beosztasok, figyelmeztetesek
+
+
+def _muszakos_moho(generator, ev, honap, beallitas, **beallitasok):
+    return moho_muszak_beosztas(generator, ev, honap, beallitas, ugyeletszamok(generator))
+
+
+def megoldo(beallitas):
+    """Megoldó a generator.beosztas_keszites számára a megadott műszak beállítással
+
+    Az eredmény (a MEGOLDOK függvényeihez hasonlóan) folyamatok között is
+    átadható, így kötegelt forgatókönyvben is használható.
+    """
+    return partial(_muszakos_moho, beallitas=beallitas)
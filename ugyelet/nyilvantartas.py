@@ -0,0 +1,178 @@
+"""Tartós méltányossági nyilvántartás SQLite-ban
+
+Az ügyeletszámok eddig csak a generátor memóriájában éltek: új generátorral
+nulláról indultak, így az éves (összes, hétvégi, ünnepnapi) terhelés sem
+helyes, sem lekérdezhető nem volt. A nyilvántartás minden beosztott
+ügyeletet rögzít egy helyi SQLite fájlban (külön szolgáltatás nélkül), a
+következő generálás pedig egyetlen összesítő lekérdezéssel kapja meg a
+korábbi terhelést, a régi beosztások visszajátszása nélkül:
+
+    nyilvantartas = Nyilvantartas('ugyeletek.sqlite')
+    tol, ig = elozo_idoszak(2024, 3)  # az előző 12 hónap
+    generator.elozmenyek_beallitas(nyilvantartas.ugyeletszamok(tol, ig))
+    beosztas = generator.beosztas_generalas(2024, 3)
+    nyilvantartas.rogzites(beosztas)
+
+Egy hónap újrarögzítése a hónap összes korábbi bejegyzését (bármely
+műszakban) felülírja, így ugyanannak a hónapnak az újragenerálása más
+műszakbeosztással sem számolódik kétszer. A tábla kulcsa
+(dátum, műszak, orvos), így az időszakos lekérdezések a kulcson futnak; az
+(orvos, dátum) index az egy orvosra szűrt lekérdezéseket gyorsítja.
+"""
+import calendar
+import sqlite3
+import threading
+from collections import namedtuple
+from datetime import date, timedelta
+
+from .muszakok import napi_beosztasok
+
+# Egy orvos terhelése egy időszakban
+Terheles = namedtuple('Terheles', ['ugyeletek', 'hetvegi', 'unnepnapi'])
+
+SEMA = """
+CREATE TABLE IF NOT EXISTS ugyeletek (
+    datum TEXT NOT NULL,
+    muszak TEXT NOT NULL DEFAULT '',
+    orvos TEXT NOT NULL,
+    hetvege INTEGER NOT NULL,
+    unnepnap INTEGER NOT NULL,
+    forras TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (datum, muszak, orvos)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS ugyeletek_orvos ON ugyeletek (orvos, datum, hetvege, unnepnap);
+"""
+
+
+def husvet(ev):
+    """Húsvétvasárnap dátuma a Gergely-naptárban (névtelen algoritmus)"""
+    a, b, c = ev % 19, ev // 100, ev % 100
+    d, e = divmod(b, 4)
+    g = (8 * b + 13) // 25
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 19 * l) // 433
+    honap = (h + l - 7 * m + 90) // 25
+    return date(ev, honap, (h + l - 7 * m + 33 * honap + 19) % 32)
+
+
+def unnepnapok(ev):
+    """A magyarországi munkaszüneti napok az adott évben"""
+    vasarnap = husvet(ev)
+    mozgo = [-2, 0, 1, 49, 50]  # nagypéntek, húsvét, húsvéthétfő, pünkösd, pünkösdhétfő
+    return frozenset(
+        [date(ev, honap, nap) for honap, nap in [(1, 1), (3, 15), (5, 1), (8, 20), (10, 23), (11, 1), (12, 25), (12, 26)]]
+        + [vasarnap + timedelta(days=eltolas) for eltolas in mozgo]
+    )
+
+
+def elozo_idoszak(ev, honap, honapok=12):
+    """Az (év, hónap) előtti honapok hónap első és utolsó napja (mindkettő benne van)"""
+    sorszam = ev * 12 + honap - 1 - honapok
+    tol = date(sorszam // 12, sorszam % 12 + 1, 1)
+    return tol, date(ev, honap, 1) - timedelta(days=1)
+
+
+def honap_idoszak(ev, honap):
+    """A hónap első és utolsó napja"""
+    return date(ev, honap, 1), date(ev, honap, calendar.monthrange(ev, honap)[1])
+
+
+def _hatarok(tol, ig):
+    """Az időszak végei dátum szövegként; None esetén nyitott vég"""
+    return tol.isoformat() if tol else '', ig.isoformat() if ig else '9999-12-31'
+
+
+class Nyilvantartas:
+    """Beosztott ügyeletek SQLite táblában, időszakos összesítésekkel
+
+    Az objektum szálak között megosztható (a kapcsolatot zár védi), több
+    folyamat pedig ugyanazt a fájlt a saját példányán keresztül használhatja.
+    """
+    def __init__(self, utvonal=':memory:'):
+        self.utvonal = utvonal
+        self._kapcsolat = sqlite3.connect(utvonal, check_same_thread=False, timeout=30)
+        self._zar = threading.Lock()
+        with self._zar, self._kapcsolat:
+            if utvonal != ':memory:':
+                self._kapcsolat.execute('PRAGMA journal_mode=WAL')
+            self._kapcsolat.executescript(SEMA)
+
+    def bezaras(self):
+        with self._zar:
+            self._kapcsolat.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *hiba):
+        self.bezaras()
+        return False
+
+    def rogzites(self, beosztas, forras=''):
+        """Egy beosztás ügyeleteinek rögzítése; visszaadja a rögzített ügyeletek számát
+
+        A beosztás hónapjainak összes korábbi bejegyzése (bármely műszakban,
+        a beosztásban nem szereplő napokon is) törlődik, így az újragenerált
+        hónap felülírja a régit.
+        """
+        unnepek = {}
+        honapok = set()
+        sorok = []
+        for datum_str, muszak, orvosok in napi_beosztasok(beosztas):
+            datum = date.fromisoformat(datum_str)
+            if datum.year not in unnepek:
+                unnepek[datum.year] = unnepnapok(datum.year)
+            hetvege = int(datum.weekday() >= 5)
+            unnepnap = int(datum in unnepek[datum.year])
+            honapok.add((datum.year, datum.month))
+            # Az egy műszakos beosztás műszak kulcsa (None) a táblában üres szöveg
+            sorok.extend((datum_str, muszak or '', orvos, hetvege, unnepnap, forras) for orvos in orvosok)
+        with self._zar, self._kapcsolat:
+            self._kapcsolat.executemany(
+                'DELETE FROM ugyeletek WHERE datum BETWEEN ? AND ?',
+                [_hatarok(*honap_idoszak(ev, honap)) for ev, honap in sorted(honapok)]
+            )
+            self._kapcsolat.executemany('INSERT INTO ugyeletek VALUES (?, ?, ?, ?, ?, ?)', sorok)
+        return len(sorok)
+
+    def torles(self, tol, ig):
+        """A tol és ig közötti napok (mindkettő benne van) bejegyzéseinek törlése"""
+        with self._zar, self._kapcsolat:
+            return self._kapcsolat.execute(
+                'DELETE FROM ugyeletek WHERE datum BETWEEN ? AND ?', (tol.isoformat(), ig.isoformat())
+            ).rowcount
+
+    def osszesites(self, tol=None, ig=None):
+        """{orvos: Terheles} a tol és ig közötti napokra egyetlen lekérdezéssel (None = nyitott vég)"""
+        with self._zar:
+            sorok = self._kapcsolat.execute(
+                'SELECT orvos, COUNT(*), SUM(hetvege), SUM(unnepnap) FROM ugyeletek '
+                'WHERE datum >= ? AND datum <= ? GROUP BY orvos',
+                _hatarok(tol, ig),
+            ).fetchall()
+        return {orvos: Terheles(*szamok) for orvos, *szamok in sorok}
+
+    def orvos_osszesites(self, orvos, tol=None, ig=None):
+        """Egy orvos Terheles-e az időszakban (az orvos indexén)"""
+        with self._zar:
+            sor = self._kapcsolat.execute(
+                'SELECT COUNT(*), COALESCE(SUM(hetvege), 0), COALESCE(SUM(unnepnap), 0) FROM ugyeletek '
+                'WHERE orvos = ? AND datum >= ? AND datum <= ?',
+                (orvos, *_hatarok(tol, ig)),
+            ).fetchone()
+        return Terheles(*sor)
+
+    def orvos_ugyeletei(self, orvos, tol=None, ig=None):
+        """Egy orvos ügyeletei (dátum szöveg, műszak) párokként, dátum szerint"""
+        with self._zar:
+            return self._kapcsolat.execute(
+                'SELECT datum, muszak FROM ugyeletek WHERE orvos = ? AND datum >= ? AND datum <= ? '
+                'ORDER BY datum',
+                (orvos, *_hatarok(tol, ig)),
+            ).fetchall()
+
+    def ugyeletszamok(self, tol=None, ig=None):
+        """{orvos: ügyeletek száma} az időszakban, a generátor kiinduló terheléséhez"""
+        return {orvos: terheles.ugyeletek for orvos, terheles in self.osszesites(tol, ig).items()}
@@ -0,0 +1,193 @@
+"""Cserélhető beosztási megoldók
+
+Minden megoldó (generator, ev, honap, **beallitasok) -> (beosztas, figyelmeztetesek)
+alakú függvény, a generátor állapotát nem módosítja. A MEGOLDOK szótárban
+név szerint érhetők el:
+
+    'moho'          az eredeti napról napra haladó mohó kiválasztás
+    'veletlen_moho' a mohó kiválasztás seed szerinti véletlen döntetlen-feloldással
+    'cpsat'         a teljes hónap egyetlen optimalizálási feladatként (OR-Tools CP-SAT)
+    'tobbinditas'   sok véletlenített futtatás párhuzamosan, a legjobb eredménnyel
+                    (lásd tobbinditas.py)
+
+A CP-SAT modellben kemény korlát az elérhetőség és a párosítási tiltás,
+a napi két orvos pedig a hiányzó helyek nagy súlyú büntetésével szerepel,
+így megoldhatatlan napok esetén is van eredmény. A lefedettség után az
+ügyeletszámok négyzetösszegét minimalizáljuk (az előző hónapokból hozott
+számokkal együtt), ami a terhelés kiegyenlítését jelenti. A mohó eredmény
+kiinduló megoldásként (hint) szerepel, és azt adjuk vissza, ha az OR-Tools
+nincs telepítve, vagy az időkorlát alatt nem lett jobb megoldás. A keresés
+alatt egy figyelő szál másodpercenként jelzi a haladást, és ha a generátor
+haladas függvénye megszakítást jelez, leállítja a keresést.
+"""
+import threading
+import time
+
+import numpy as np
+
+NAPI_LETSZAM = 2
+# A CP-SAT keresés figyelésének gyakorisága másodpercben
+FIGYELES_IDOKOZ = 0.2
+
+
+def ugyeletszamok(generator):
+    """Az orvosok jelenlegi ügyeletszámai {orvos: szám} formában"""
+    return {orvos: adatok['ugyeletek_szama'] for orvos, adatok in generator.orvosok.items()}
+
+
+def ertekeles(beosztas, kezdo_szamok):
+    """(hiányzó helyek száma, ügyeletszámok négyzetösszege) – mindkettő kisebb a jobb"""
+    szamok = dict(kezdo_szamok)
+    hiany = 0
+    for orvosok in beosztas.values():
+        hiany += max(0, NAPI_LETSZAM - len(orvosok))
+        for orvos in orvosok:
+            szamok[orvos] += 1
+    return hiany, sum(szam * szam for szam in szamok.values())
+
+
+def moho(generator, ev, honap, **beallitasok):
+    """Az eredeti mohó beosztás megoldóként"""
+    return generator.moho_beosztas(ev, honap, ugyeletszamok(generator))
+
+
+def veletlen_moho(generator, ev, honap, seed=0, **beallitasok):
+    """A mohó beosztás véletlen döntetlen-feloldással; azonos seeddel azonos eredmény"""
+    return generator.moho_beosztas(ev, honap, ugyeletszamok(generator), np.random.default_rng(seed))
+
+
+def tobbinditas(generator, ev, honap, **beallitasok):
+    """A legjobb véletlenített indítás beosztása (a beállítások: tobbinditas.legjobb_inditas)"""
+    from .diagnosztika import naplo
+    from .tobbinditas import legjobb_inditas
+
+    eredmeny = legjobb_inditas(generator, ev, honap, **beallitasok)
+    naplo.info(
+        "%d-%02d: a legjobb indítás seedje %d (%d változatból), megismételhető a "
+        "'veletlen_moho' megoldóval", ev, honap, eredmeny.seed, eredmeny.kiertekelt
+    )
+    return eredmeny.beosztas, eredmeny.figyelmeztetesek
+
+
+def _kereses_figyeles(generator, solver, idokorlat, kesz, hibak):
+    """A CP-SAT keresés haladásának jelzése, amíg a kesz esemény be nem áll
+
+    Ha a haladas függvény kivételt dob (pl. Megszakitva), a kivételt a hibak
+    listába tesszük, és a keresés végéig ismételten leállítjuk, hogy a
+    Solve indulása előtti kérés se vesszen el.
+    """
+    kezdet = time.monotonic()
+    osszes = max(1, int(idokorlat))
+    while not kesz.wait(FIGYELES_IDOKOZ):
+        if hibak:
+            solver.StopSearch()
+            continue
+        try:
+            generator.haladas_jelzes('cpsat_kereses', min(int(time.monotonic() - kezdet), osszes), osszes)
+        except Exception as e:
+            hibak.append(e)
+            solver.StopSearch()
+
+
+def cpsat_beosztas(generator, ev, honap, idokorlat=10.0, seed=0, szalak=0, **beallitasok):
+    """Teljes havi beosztás OR-Tools CP-SAT-tal, a mohó eredményből indulva
+
+    idokorlat: a keresés felső korlátja másodpercben
+    seed: a keresés véletlen magja (azonos maggal és egy szállal determinisztikus)
+    szalak: a keresési szálak száma (0 = a CP-SAT alapértelmezése)
+    """
+    kezdo = ugyeletszamok(generator)
+    moho_eredmeny, moho_figyelmeztetesek = generator.moho_beosztas(ev, honap, dict(kezdo))
+    try:
+        from ortools.sat.python import cp_model
+    except ImportError:
+        return moho_eredmeny, moho_figyelmeztetesek + [
+            "Az OR-Tools nincs telepítve, a mohó beosztást használjuk"
+        ]
+
+    napok = generator.napi_elerhetoseg(ev, honap)
+    model = cp_model.CpModel()
+    valtozok = {}  # {(orvos, nap index): BoolVar}
+    hianyok = []
+
+    for t, (datum_str, elerheto) in enumerate(napok):
+        napi = []
+        for orvos in elerheto:
+            valtozo = model.NewBoolVar(f"x[{orvos},{t}]")
+            valtozok[orvos, t] = valtozo
+            napi.append(valtozo)
+            model.AddHint(valtozo, orvos in moho_eredmeny[datum_str])
+        hiany = model.NewIntVar(0, NAPI_LETSZAM, f"hiany[{t}]")
+        model.Add(sum(napi) + hiany == NAPI_LETSZAM)
+        hianyok.append(hiany)
+
+        # Párosítási tiltások: a két orvos közül legfeljebb egy dolgozhat
+        for orvos in elerheto:
+            for partner in generator.korlatozasok.tiltott_partnerek(orvos):
+                if orvos < partner and (partner, t) in valtozok:
+                    model.Add(valtozok[orvos, t] + valtozok[partner, t] <= 1)
+
+    negyzetek = []
+    negyzet_korlat = 0
+    for orvos, elozo in kezdo.items():
+        orvos_valtozok = [valtozok[orvos, t] for t in range(len(napok)) if (orvos, t) in valtozok]
+        if not orvos_valtozok:
+            continue
+        felso = elozo + len(orvos_valtozok)
+        terheles = model.NewIntVar(elozo, felso, f"terheles[{orvos}]")
+        model.Add(terheles == elozo + sum(orvos_valtozok))
+        negyzet = model.NewIntVar(0, felso * felso, f"negyzet[{orvos}]")
+        model.AddMultiplicationEquality(negyzet, [terheles, terheles])
+        negyzetek.append(negyzet)
+        negyzet_korlat += felso * felso
+
+    # Egy hiányzó hely többet nyom a latban, mint bármilyen méltányossági különbség
+    hiany_suly = negyzet_korlat + 1
+    model.Minimize(hiany_suly * sum(hianyok) + sum(negyzetek))
+
+    solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = float(idokorlat)
+    solver.parameters.random_seed = int(seed)
+    if szalak:
+        solver.parameters.num_workers = int(szalak)
+    generator.haladas_jelzes('cpsat_kereses', 0, max(1, int(idokorlat)))
+    kesz = threading.Event()
+    hibak = []
+    figyelo = None
+    if generator.haladas is not None:
+        figyelo = threading.Thread(
+            target=_kereses_figyeles, args=(generator, solver, idokorlat, kesz, hibak), daemon=True
+        )
+        figyelo.start()
+    try:
+        with generator.meres.szakasz('cpsat_kereses'):
+            status = solver.Solve(model)
+    finally:
+        kesz.set()
+        if figyelo is not None:
+            figyelo.join()
+    if hibak:
+        raise hibak[0]
+    if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        return moho_eredmeny, moho_figyelmeztetesek
+
+    beosztas = {}
+    figyelmeztetesek = []
+    for t, (datum_str, elerheto) in enumerate(napok):
+        beosztas[datum_str] = [orvos for orvos in elerheto if solver.Value(valtozok[orvos, t])]
+        if len(elerheto) < NAPI_LETSZAM:
+            figyelmeztetesek.append(f"Nem található elegendő elérhető orvos: {datum_str} (minimum 2 szükséges)")
+        elif len(beosztas[datum_str]) < NAPI_LETSZAM:
+            figyelmeztetesek.append(f"Nem sikerült két párosítható orvost beosztani a {datum_str} napon")
+
+    if ertekeles(moho_eredmeny, kezdo) < ertekeles(beosztas, kezdo):
+        return moho_eredmeny, moho_figyelmeztetesek
+    return beosztas, figyelmeztetesek
+
+
+MEGOLDOK = {
+    'moho': moho,
+    'veletlen_moho': veletlen_moho,
+    'cpsat': cpsat_beosztas,
+    'tobbinditas': tobbinditas,
+}
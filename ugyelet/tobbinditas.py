@@ -0,0 +1,162 @@
+"""Párhuzamos többszöri indítás véletlenített megoldóval
+
+A mohó beosztásban azonos ügyeletszámnál az Excel sorrendje dönt, így az
+eredmény a névsor sorrendjétől függ, és könnyen marad lefedetlen nap. Itt
+ugyanazt a hónapot sok seeddel futtatjuk (alapból a 'veletlen_moho'
+megoldóval) több folyamatban, minden változatot pontozunk, és a legjobbat
+adjuk vissza.
+
+A pontszám lexikografikus, kisebb a jobb:
+    1. hiányzó helyek száma (lefedettség)
+    2. az ügyeletszámok varianciája az előző hónapokkal együtt (méltányosság)
+    3. a hónap hétvégi ügyeleteinek varianciája orvosonként (hétvégi egyensúly)
+Egyenlő pontszámnál a kisebb seed nyer, így az eredmény nem függ attól,
+melyik folyamat végez előbb.
+
+Az időkorlát falióra szerinti: a határidő után egyik folyamat sem kezd új
+változatot (de mindegyik legalább egyet lefuttat). Megszakításkor (a
+generátor haladas függvényének kivételénél) a függőben lévő változatok
+elmaradnak, és a futó folyamatokat sem várjuk meg. A nyertes seeddel a
+beosztás megismételhető:
+
+    MEGOLDOK['veletlen_moho'](generator, ev, honap, seed=eredmeny.seed)
+"""
+import copy
+import multiprocessing
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date
+
+import numpy as np
+
+from .diagnosztika import NaploDiagnosztika
+from .meres import KIKAPCSOLT
+from .optimalis_beosztas import MEGOLDOK, NAPI_LETSZAM, ugyeletszamok
+
+ALAP_INDITASOK = 32
+
+Pontszam = namedtuple('Pontszam', ['hiany', 'variancia', 'hetvegi_variancia'])
+# A nyertes változat: beosztás, figyelmeztetések, seed, pontszám és a kiértékelt változatok száma
+InditasEredmeny = namedtuple(
+    'InditasEredmeny', ['beosztas', 'figyelmeztetesek', 'seed', 'pontszam', 'kiertekelt']
+)
+
+
+def pontszam(beosztas, kezdo_szamok):
+    """Egy havi beosztás Pontszam-a a hónap előtti {orvos: ügyeletszám} mellett"""
+    szamok = dict(kezdo_szamok)
+    hetvegi = dict.fromkeys(kezdo_szamok, 0)
+    hiany = 0
+    for datum_str, orvosok in beosztas.items():
+        hiany += max(0, NAPI_LETSZAM - len(orvosok))
+        hetvege = date.fromisoformat(datum_str).weekday() >= 5
+        for orvos in orvosok:
+            szamok[orvos] += 1
+            if hetvege:
+                hetvegi[orvos] += 1
+    if not szamok:
+        return Pontszam(hiany, 0.0, 0.0)
+    # kerekítve, hogy a lebegőpontos zaj ne döntsön két egyforma változat között
+    return Pontszam(
+        hiany,
+        round(float(np.var(np.fromiter(szamok.values(), dtype=float))), 9),
+        round(float(np.var(np.fromiter(hetvegi.values(), dtype=float))), 9),
+    )
+
+
+def _valtozatok(generator, ev, honap, megoldo, seedek, hatarido, beallitasok, jelzes=None):
+    """A seedek sorban a határidőig (legalább az első): [(pontszám, seed, beosztás, figyelmeztetések)]
+
+    jelzes: opcionális (kiértékelt változatok száma) függvény minden változat után
+    """
+    kezdo = ugyeletszamok(generator)
+    eredmenyek = []
+    for seed in seedek:
+        if eredmenyek and time.time() >= hatarido:
+            break
+        beosztas, figyelmeztetesek = megoldo(generator, ev, honap, seed=seed, **beallitasok)
+        eredmenyek.append((pontszam(beosztas, kezdo), seed, beosztas, figyelmeztetesek))
+        if jelzes is not None:
+            jelzes(len(eredmenyek))
+    return eredmenyek
+
+
+def _csendes(generator):
+    """A generátor másolata a változatokhoz: a napi haladás helyett a változatokat jelezzük"""
+    masolat = copy.copy(generator)
+    masolat.haladas = None
+    return masolat
+
+
+def _szallithato(generator):
+    """A generátor másolata a munkás folyamatoknak, a felületi kimenetek nélkül"""
+    masolat = _csendes(generator)
+    masolat.diagnosztika = NaploDiagnosztika()
+    masolat.meres = KIKAPCSOLT
+    return masolat
+
+
+def _folyamat_kornyezet():
+    """Folyamatindítási környezet a munkásoknak
+
+    A hívó többszálú (Streamlit, háttérfeladatok), ezért fork helyett
+    forkserver, ahol az nem érhető el, ott spawn indítja a folyamatokat.
+    """
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('forkserver')
+    return multiprocessing.get_context('spawn')
+
+
+def legjobb_inditas(generator, ev, honap, inditasok=ALAP_INDITASOK, idokorlat=10.0,
+                    megoldo='veletlen_moho', seed=0, munkasok=None, **beallitasok):
+    """A legjobb pontszámú változat a seed, seed + 1, ... seedekkel futtatott megoldóból
+
+    inditasok: a változatok legnagyobb száma
+    idokorlat: falióra szerinti keret másodpercben, a folyamatok indításával együtt
+    megoldo: a MEGOLDOK egyik neve vagy függvény, amely seed beállítást fogad
+    munkasok: a folyamatok száma (alapból a processzorok száma, 1 = ugyanebben a folyamatban)
+    A generátor állapotát nem módosítja, a többi beállítás a megoldóé.
+    """
+    if not callable(megoldo):
+        megoldo = MEGOLDOK[megoldo]
+    hatarido = time.time() + idokorlat
+    seedek = list(range(seed, seed + max(1, inditasok)))
+    munkasok = min(munkasok or os.cpu_count() or 1, len(seedek))
+    # A mátrixot egyszer számoljuk ki, a munkások a kész mátrixot kapják meg
+    generator.elerhetosegi_matrix(ev, honap)
+
+    with generator.meres.szakasz('tobbinditas'):
+        if munkasok == 1:
+            valtozatok = _valtozatok(
+                _csendes(generator), ev, honap, megoldo, seedek, hatarido, beallitasok,
+                lambda kiertekelt: generator.haladas_jelzes('tobbinditas', kiertekelt, len(seedek))
+            )
+        else:
+            szallithato = _szallithato(generator)
+            executor = ProcessPoolExecutor(max_workers=munkasok, mp_context=_folyamat_kornyezet())
+            try:
+                # Váltott seed kiosztás: időtúllépéskor a kis seedek futnak le
+                jovok = [
+                    executor.submit(
+                        _valtozatok, szallithato, ev, honap, megoldo,
+                        seedek[i::munkasok], hatarido, beallitasok
+                    )
+                    for i in range(munkasok)
+                ]
+                valtozatok = []
+                for jovo in as_completed(jovok):
+                    valtozatok.extend(jovo.result())
+                    generator.haladas_jelzes('tobbinditas', len(valtozatok), len(seedek))
+            except BaseException:
+                # Megszakításkor (vagy hibánál) nem várjuk meg a futó változatokat
+                executor.shutdown(wait=False, cancel_futures=True)
+                raise
+            executor.shutdown()
+    generator.meres.szamlalo('kiertekelt_inditasok', len(valtozatok))
+
+    legjobb_pont, legjobb_seed, beosztas, figyelmeztetesek = min(
+        valtozatok, key=lambda valtozat: valtozat[:2]
+    )
+    return InditasEredmeny(beosztas, figyelmeztetesek, legjobb_seed, legjobb_pont, len(valtozatok))